@@ -0,0 +1,169 @@
+"""Script catalog load time versus the number of scripts
+
+Generates a scripts tree of synthetic .ps1 files with comment-based help
+in ten sub folders and times what load_scripts does at start-up:
+
+    cold   no index yet: scan, hash and parse every header, save the index
+    warm   index from the last session: load it, then revalidate with a scan
+    touch  one script changed: rescan and reparse just that one
+    typing "synthetic 7" typed into the search box one key at a time: the
+           search plus, where Tk has a display, the Treeview update of
+           the GUI's ScriptTreeRows, per keystroke
+
+Each size is measured repeat times and the median of every step kept.
+
+    python benchmarks/bench_catalog.py --sizes 100 1000 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import benchlib
+from yonky_catalog import ScriptCatalog, script_info
+
+TYPED_QUERY = "synthetic 7"
+
+SCRIPT_TEMPLATE = """<#
+.SYNOPSIS
+    Synthetic script {number}
+.DESCRIPTION
+    Checks component {number} of the benchmark estate and reports its state.
+.PARAMETER Target
+    Host to check
+#>
+param(
+    [Parameter(Mandatory)][string]$Target,
+    [int]$Threshold = {number}
+)
+Write-Output "Checking $Target"
+"""
+
+
+def make_scripts(root, count):
+    for number in range(count):
+        folder = os.path.join(root, f"group{number % 10}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"check-{number:05d}.ps1"), "w", encoding="utf-8") as f:
+            f.write(SCRIPT_TEMPLATE.format(number=number))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def load_scripts(catalog):
+    """What ScriptLauncherApp.load_scripts runs on its background thread"""
+    diff = catalog.refresh()
+    catalog.update_metadata()
+    catalog.save_index()
+    return diff
+
+
+def script_tree_rows(catalog, diff):
+    """The GUI's ScriptTreeRows holding every script, or None without a display
+
+    Returns (rows, root); destroy root when done.
+    """
+    try:
+        import tkinter
+        from tkinter import ttk
+        from yonky_gui import ScriptTreeRows
+    except ImportError:
+        return None, None
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return None, None
+    root.withdraw()
+    tree = ttk.Treeview(root, columns=("Description",), show="tree headings")
+    rows = ScriptTreeRows(tree)
+    rows.update(diff, lambda entry: (script_info(entry, {})["description"],))
+    root.update_idletasks()
+    return rows, root
+
+
+def type_query(catalog, rows):
+    """Milliseconds per keystroke of typing TYPED_QUERY, as filter_scripts handles it"""
+    times = []
+    for end in range(1, len(TYPED_QUERY) + 1):
+        start = time.perf_counter()
+        matches = catalog.search_index.search(TYPED_QUERY[:end])
+        if rows is not None:
+            rows.filter(matches)
+            rows.tree.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def measure(count):
+    with benchlib.sandbox() as directory:
+        root = os.path.join(directory, "scripts")
+        index_file = os.path.join(directory, "script_index.json")
+        make_scripts(root, count)
+
+        catalog = ScriptCatalog(root, index_file)
+        _, cold_scan = timed(catalog.refresh)
+        _, cold_metadata = timed(catalog.update_metadata)
+        _, cold_save = timed(catalog.save_index)
+
+        catalog = ScriptCatalog(root, index_file)
+        diff, index_load = timed(catalog.load_index)
+        _, warm_refresh = timed(lambda: load_scripts(catalog))
+
+        path = os.path.join(root, "group0", "check-00000.ps1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("# touched\n")
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        _, touch = timed(lambda: load_scripts(catalog))
+
+        # A query that matches, so the lookup and substring checks are timed
+        matches, search = timed(lambda: catalog.search_index.search(TYPED_QUERY))
+        assert matches, "search benchmark query matched no scripts"
+
+        rows, root = script_tree_rows(catalog, diff)
+        if rows is None:
+            print("No Tk display: keystroke times cover the search only", file=sys.stderr)
+        try:
+            keystrokes = type_query(catalog, rows)
+        finally:
+            if root is not None:
+                root.destroy()
+        return {
+            "scripts": len(diff.added),
+            "cold_scan_seconds": cold_scan,
+            "cold_metadata_seconds": cold_metadata,
+            "cold_save_index_seconds": cold_save,
+            "cold_load_scripts_seconds": cold_scan + cold_metadata + cold_save,
+            "index_load_seconds": index_load,
+            "warm_load_scripts_seconds": warm_refresh,
+            "touch_load_scripts_seconds": touch,
+            "search_ms": search * 1000,
+            "keystroke_median_ms": statistics.median(keystrokes),
+            "keystroke_max_ms": max(keystrokes),
+            "index_bytes": os.path.getsize(index_file),
+        }
+
+
+def run(sizes=(100, 1000, 5000), repeat=benchlib.REPEAT):
+    return {str(count): benchlib.median_of([measure(count) for _ in range(repeat)]) for count in sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="numbers of scripts to generate")
+    parser.add_argument("--repeat", type=int, default=benchlib.REPEAT, help="measurements per size")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args()
+    results = run(args.sizes, args.repeat)
+    benchlib.print_results(results)
+    if args.json:
+        benchlib.write_results({"meta": benchlib.metadata(), "benchmarks": {"catalog": results}}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Concurrent run scaling of the ExecutionEngine
+
+Queues the same batch of synthetic runs (each sleeps, then prints some
+output) on engines with increasing worker counts. Every run goes through
+run_script, so process start-up, the shared pipe loop, run logs and the
+output queues are all part of the measurement; a pump thread drains the
+runs' output like the GUI does. Each worker count is measured repeat
+times and the median of every metric kept.
+
+    python benchmarks/bench_concurrency.py --runs 32 --workers 1 2 4 8 16
+"""
+import argparse
+import threading
+import time
+
+import benchlib
+from benchlib import yonky
+
+
+def drain_runs(runs, stop):
+    """Move queued output into each run's buffer until stop is set"""
+    interval = yonky.OUTPUT_PUMP_INTERVAL_MS / 1000
+    while not stop.is_set():
+        for run in runs:
+            run.buffer.extend(run.output.drain())
+        time.sleep(interval)
+
+
+def measure(runs, workers, sleep, lines, config_data):
+    engine = yonky.ExecutionEngine(lambda run: yonky.run_script(run, config_data), workers)
+    command = benchlib.child_command(lines, sleep=sleep)
+    start = time.perf_counter()
+    submitted = [engine.submit("bench.ps1", config_data, command=command) for _ in range(runs)]
+    stop = threading.Event()
+    pump = threading.Thread(target=drain_runs, args=(submitted, stop), daemon=True)
+    pump.start()
+    while not all(run.finished for run in submitted):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    pump.join()
+    engine.shutdown()
+
+    failed = sum(1 for run in submitted if run.status != yonky.RunState.SUCCEEDED)
+    ideal = sleep * -(-runs // workers)
+    waits = [run.start_time - run.submitted for run in submitted]
+    return {
+        "elapsed_seconds": elapsed,
+        "runs_per_second": runs / elapsed,
+        "efficiency": ideal / elapsed if elapsed else None,
+        "overhead_per_run_seconds": max(0.0, elapsed - ideal) * workers / runs,
+        "queue_wait_p95_seconds": benchlib.percentile(waits, 0.95),
+        "failed": failed,
+    }
+
+
+def run(runs=32, workers=(1, 2, 4, 8, 16), sleep=0.2, lines=200, repeat=benchlib.REPEAT):
+    with benchlib.sandbox():
+        config_data = benchlib.bench_config(run_log_retention=runs * len(workers) * repeat + 1)
+        results = {"runs": runs, "sleep_seconds": sleep, "lines_per_run": lines}
+        for count in workers:
+            results[f"workers_{count}"] = benchlib.median_of(
+                [measure(runs, count, sleep, lines, config_data) for _ in range(repeat)])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=32, help="runs per batch")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="worker counts to try")
+    parser.add_argument("--sleep", type=float, default=0.2, help="seconds each child sleeps")
+    parser.add_argument("--lines", type=int, default=200, help="lines each child prints")
+    parser.add_argument("--repeat", type=int, default=benchlib.REPEAT, help="measurements per worker count")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args()
+    results = run(args.runs, args.workers, args.sleep, args.lines, args.repeat)
+    benchlib.print_results(results)
+    if args.json:
+        benchlib.write_results({"meta": benchlib.metadata(), "benchmarks": {"concurrency": results}}, args.json)
+
+
+if __name__ == "__main__":
+    main()
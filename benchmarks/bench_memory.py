@@ -0,0 +1,114 @@
+"""Memory growth over a long session
+
+Simulates a launcher left open for a long time: many runs one after the
+other, each printing output that a pump thread moves into the run's
+bounded buffer, while only the newest KEPT_RUNS runs stay referenced (the
+GUI closes older tabs). Python heap (tracemalloc) and resident set size
+are sampled after a warm-up and then every sample_every runs; bounded
+output should keep the growth flat.
+
+    python benchmarks/bench_memory.py --runs 500 --lines 2000
+"""
+import argparse
+import gc
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import benchlib
+from benchlib import yonky
+
+# Runs whose output stays referenced, like MAX_RUN_TABS in yonky_gui
+KEPT_RUNS = 20
+
+
+def run(runs=300, lines=2000, workers=4, sample_every=50, warmup=None):
+    warmup = sample_every if warmup is None else warmup
+    with benchlib.sandbox():
+        config_data = benchlib.bench_config(max_concurrency=workers)
+        engine = yonky.ExecutionEngine(lambda run: yonky.run_script(run, config_data), workers)
+        command = benchlib.child_command(lines)
+        kept = OrderedDict()
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def pump():
+            while not stop.is_set():
+                with lock:
+                    active = list(kept.values())
+                for run in active:
+                    run.buffer.extend(run.output.drain())
+                time.sleep(yonky.OUTPUT_PUMP_INTERVAL_MS / 1000)
+
+        def batch(count):
+            submitted = [engine.submit("bench.ps1", config_data, command=command) for _ in range(count)]
+            with lock:
+                for run in submitted:
+                    kept[run.run_id] = run
+                while len(kept) > KEPT_RUNS:
+                    kept.popitem(last=False)
+            for run in submitted:
+                while not run.finished:
+                    time.sleep(0.005)
+
+        pumper = threading.Thread(target=pump, daemon=True)
+        pumper.start()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            batch(warmup)
+            samples = []
+            done = 0
+            while done < runs:
+                count = min(sample_every, runs - done)
+                batch(count)
+                done += count
+                gc.collect()
+                heap, _ = tracemalloc.get_traced_memory()
+                samples.append({"runs": done, "heap_bytes": heap, "rss_bytes": benchlib.rss_bytes()})
+            _, heap_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            stop.set()
+            pumper.join()
+            engine.shutdown()
+        elapsed = time.perf_counter() - start
+
+    first, last = samples[0], samples[-1]
+    measured_runs = max(1, last["runs"] - first["runs"])
+    result = {
+        "runs": runs,
+        "lines_per_run": lines,
+        "elapsed_seconds": elapsed,
+        "heap_start_bytes": first["heap_bytes"],
+        "heap_end_bytes": last["heap_bytes"],
+        "heap_peak_bytes": heap_peak,
+        "heap_growth_per_100_runs_bytes": (last["heap_bytes"] - first["heap_bytes"]) * 100 / measured_runs,
+        "samples": samples,
+    }
+    if first["rss_bytes"] is not None and last["rss_bytes"] is not None:
+        result["rss_start_bytes"] = first["rss_bytes"]
+        result["rss_end_bytes"] = last["rss_bytes"]
+        result["rss_growth_per_100_runs_bytes"] = (last["rss_bytes"] - first["rss_bytes"]) * 100 / measured_runs
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=300, help="runs after the warm-up")
+    parser.add_argument("--lines", type=int, default=2000, help="lines each child prints")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent runs")
+    parser.add_argument("--sample-every", type=int, default=50, help="runs between memory samples")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args()
+    results = run(args.runs, args.lines, args.workers, args.sample_every)
+    printed = dict(results)
+    printed.pop("samples")
+    benchlib.print_results(printed)
+    if args.json:
+        benchlib.write_results({"meta": benchlib.metadata(), "benchmarks": {"memory": results}}, args.json)
+
+
+if __name__ == "__main__":
+    main()
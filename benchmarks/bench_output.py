@@ -0,0 +1,163 @@
+"""Output throughput and pump latency benchmark
+
+Spawns a synthetic child process that prints a large number of lines and
+reads it through the shared pipe loop (yonky_pipes) into an OutputQueue,
+exactly like run_script does, draining on a fixed interval with the GUI
+output pump's own step, yonky_core.render_output. Where Tk has a display
+the lines are rendered into a withdrawn Text widget, so pump times include
+the widget; otherwise only the queue and buffer are timed. Every 1000th
+line carries the time it was written, giving the latency from the child's
+write to the render. A second phase floods the queue from several threads
+the way log_output does. Both are measured repeat times and the median of
+every metric kept.
+
+    python benchmarks/bench_output.py --lines 200000
+    python benchmarks/bench_output.py --lines 50000 --no-tk
+    python benchmarks/bench_output.py --json output.json
+"""
+import argparse
+import sys
+import threading
+import time
+
+import benchlib
+from benchlib import yonky
+from yonky_pipes import spawn
+
+STAMP_EVERY = 1000
+
+
+def tk_text():
+    """A withdrawn Tk Text widget like an output tab, or (None, None) without a display
+
+    Returns (root, text); destroy root when done.
+    """
+    try:
+        import tkinter
+    except ImportError:
+        return None, None
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return None, None
+    root.withdraw()
+    text = tkinter.Text(root)
+    text.pack()
+    return root, text
+
+
+def pump(queue, buffer, done, text=None, root=None):
+    """Drain queue with the GUI's render_output step until done() and empty
+
+    Returns (rendered, dropped, pump durations, latencies of stamped lines).
+    """
+    interval = yonky.OUTPUT_PUMP_INTERVAL_MS / 1000
+    rendered = dropped = 0
+    pump_times = []
+    latencies = []
+    while not done() or len(queue):
+        pump_start = time.perf_counter()
+        records, backlog = yonky.render_output(queue, buffer, text)
+        dropped += backlog
+        if records and root is not None:
+            root.update()
+        now = time.time()
+        for _, message, _ in records:
+            if message[9:10] == "@":
+                latencies.append(now - float(message[10:27]))
+        pump_times.append(time.perf_counter() - pump_start)
+        rendered += len(records)
+        if len(queue) < yonky.OUTPUT_MAX_LINES_PER_PUMP:
+            time.sleep(interval)
+    return rendered, dropped, pump_times, latencies
+
+
+def child_output(lines, width, use_tk):
+    queue = yonky.OutputQueue()
+    buffer = yonky.OutputBuffer()
+
+    root = text = None
+    if use_tk:
+        root, text = tk_text()
+        if root is None:
+            print("No Tk display: pump times cover the queue and buffer only", file=sys.stderr)
+
+    start = time.perf_counter()
+    process = spawn(benchlib.child_command(lines, width, stamp_every=STAMP_EVERY),
+                    lambda message, tag: queue.put(message, tag))
+    rendered, dropped, pump_times, latencies = pump(
+        queue, buffer, lambda: process.wait_for_output(0), text, root)
+    elapsed = time.perf_counter() - start
+    process.wait()
+    if root is not None:
+        root.destroy()
+
+    return {
+        "lines": rendered + dropped,
+        "skipped_lines": dropped,
+        "elapsed_seconds": elapsed,
+        "lines_per_second": (rendered + dropped) / elapsed,
+        "retained_lines": len(buffer),
+        "pumps": len(pump_times),
+        "pump_p95_ms": benchlib.percentile(pump_times, 0.95) * 1000,
+        "pump_max_ms": max(pump_times) * 1000,
+        "latency_p50_ms": benchlib.percentile(latencies, 0.5) * 1000,
+        "latency_p95_ms": benchlib.percentile(latencies, 0.95) * 1000,
+        "latency_max_ms": max(latencies) * 1000,
+    }
+
+
+def log_output(messages, threads):
+    """Flood one OutputQueue from several threads while it is pumped"""
+    queue = yonky.OutputQueue()
+    buffer = yonky.OutputBuffer()
+    per_thread = messages // threads
+
+    def producer(number):
+        for i in range(per_thread):
+            queue.put(f"worker {number} message {i}", "info")
+
+    workers = [threading.Thread(target=producer, args=(number,)) for number in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    rendered, dropped, pump_times, _ = pump(queue, buffer, lambda: not any(w.is_alive() for w in workers))
+    elapsed = time.perf_counter() - start
+    return {
+        "messages": rendered + dropped,
+        "threads": threads,
+        "elapsed_seconds": elapsed,
+        "messages_per_second": (rendered + dropped) / elapsed,
+        # A flood is drained in a few dozen pumps, so its p95 is a worst
+        # case set by the producers' GIL slices; the median is comparable
+        "pump_p50_ms": benchlib.percentile(pump_times, 0.5) * 1000,
+        "pump_max_ms": max(pump_times) * 1000,
+    }
+
+
+def run(lines=100000, width=80, use_tk=True, messages=200000, threads=4, repeat=benchlib.REPEAT):
+    return {
+        "child_output": benchlib.median_of([child_output(lines, width, use_tk) for _ in range(repeat)]),
+        "log_output": benchlib.median_of([log_output(messages, threads) for _ in range(repeat)]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000, help="lines written by the child")
+    parser.add_argument("--width", type=int, default=80, help="characters per line")
+    parser.add_argument("--no-tk", dest="tk", action="store_false",
+                        help="skip the Tk Text widget even where there is a display")
+    parser.add_argument("--messages", type=int, default=200000, help="log_output messages in total")
+    parser.add_argument("--threads", type=int, default=4, help="threads calling log_output")
+    parser.add_argument("--repeat", type=int, default=benchlib.REPEAT, help="measurements of each phase")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args()
+    results = run(args.lines, args.width, args.tk, args.messages, args.threads, args.repeat)
+    benchlib.print_results(results)
+    if args.json:
+        benchlib.write_results({"meta": benchlib.metadata(), "benchmarks": {"output": results}}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Helpers shared by the benchmarks
+
+Synthetic child processes (the running Python interpreter) stand in for
+PowerShell, so every benchmark runs on Linux. sandbox() points the
+launcher's log and cache folders at a temporary directory, so benchmark
+runs leave nothing behind in the checkout.
+"""
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yonky_core as yonky
+
+# Measurements of each timed section; their median is what gets compared,
+# so one slow measurement cannot fail the release gate on its own
+REPEAT = 5
+TIMING_SUFFIXES = ("_seconds", "_ms")
+# median_of adds <timing>_spread, the range of that timing's measurements
+SPREAD_SUFFIX = "_spread"
+
+
+def child_command(lines, width=80, sleep=0.0, stamp_every=0):
+    """Command for a child that sleeps, then writes lines of width characters
+
+    With stamp_every, every stamp_every-th line carries the wall-clock time
+    it was written as its second field, for latency measurements.
+    """
+    code = (
+        "import sys, time\n"
+        f"time.sleep({sleep})\n"
+        f"line = 'x' * {width}\n"
+        f"every = {stamp_every}\n"
+        f"for i in range({lines}):\n"
+        "    if every and i % every == 0:\n"
+        "        sys.stdout.write(f'{i:08d} @{time.time():.6f} {line}\\n')\n"
+        "    else:\n"
+        "        sys.stdout.write(f'{i:08d} {line}\\n')\n"
+    )
+    return [sys.executable, "-c", code]
+
+
+def bench_config(**overrides):
+    """Default launcher configuration with overrides"""
+    return {**yonky.DEFAULT_CONFIG, **overrides}
+
+
+@contextmanager
+def sandbox():
+    """Temporary directory that also receives the run logs and cache"""
+    directory = tempfile.mkdtemp(prefix="yonky-bench-")
+    saved = yonky.LOGS_DIR, yonky.CACHE_DIR
+    yonky.LOGS_DIR = os.path.join(directory, "logs")
+    yonky.CACHE_DIR = os.path.join(directory, "cache")
+    try:
+        yield directory
+    finally:
+        yonky.LOGS_DIR, yonky.CACHE_DIR = saved
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile; None for no values"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def median_of(measurements):
+    """Median of every metric across repeated measurements (dicts with the same keys)
+
+    Each timing also gets a SPREAD_SUFFIX entry with the range of its
+    measurements, which run_all counts as that timing's noise.
+    """
+    medians = {}
+    for key in measurements[0]:
+        values = [measurement[key] for measurement in measurements]
+        medians[key] = statistics.median(values)
+        if key.endswith(TIMING_SUFFIXES) and len(values) > 1:
+            medians[key + SPREAD_SUFFIX] = max(values) - min(values)
+    return medians
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak, not current, outside Linux; ru_maxrss is in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def metadata():
+    """Where and on what the results were measured"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def print_results(results, indent=""):
+    """Print nested result dicts as an indented list"""
+    for key, value in results.items():
+        if isinstance(value, dict):
+            print(f"{indent}{key}:")
+            print_results(value, indent + "  ")
+        elif isinstance(value, float):
+            print(f"{indent}{key}: {value:,.4f}")
+        else:
+            print(f"{indent}{key}: {value}")
+
+
+def write_results(results, path):
+    """Write results as JSON to path"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,156 @@
+"""Run the whole benchmark suite and write the results as JSON
+
+    python benchmarks/run_all.py                      full suite
+    python benchmarks/run_all.py --quick              smaller sizes, a minute or two
+    python benchmarks/run_all.py --only catalog output
+    python benchmarks/run_all.py --quick --compare baseline.json --tolerance 0.3
+
+Results go to benchmarks/results/<timestamp>.json (or --output) together
+with the commit, Python version and platform they were measured on. With
+--compare, every timing, size and rate is checked against the baseline
+file: metrics ending in _seconds, _ms or _bytes must not grow, and
+_per_second metrics must not drop, by more than the tolerance. Memory
+growth (_growth_) metrics hover around zero, so they are checked by how
+many bytes they grew instead. Worst-case (_max_) values are recorded but
+too noisy to compare. Timings are the median of benchlib.REPEAT
+measurements, and a timing only regresses when it grew by more than
+both ABSOLUTE_NOISE and the spread of its measurements in either file,
+so running the same commit twice passes. The exit status is 1 when any
+metric regressed, so the suite can gate a release; on a quiet, dedicated
+machine a tighter --tolerance catches smaller regressions.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import bench_catalog
+import bench_concurrency
+import bench_memory
+import bench_output
+import benchlib
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SUITES = {
+    "catalog": {
+        "full": lambda: bench_catalog.run((100, 1000, 5000, 20000)),
+        "quick": lambda: bench_catalog.run((100, 1000, 5000)),
+    },
+    "output": {
+        "full": lambda: bench_output.run(lines=500000, messages=500000),
+        "quick": lambda: bench_output.run(lines=100000, messages=200000),
+    },
+    "concurrency": {
+        "full": lambda: bench_concurrency.run(runs=64, workers=(1, 2, 4, 8, 16, 32)),
+        "quick": lambda: bench_concurrency.run(runs=16, workers=(1, 4, 16)),
+    },
+    "memory": {
+        "full": lambda: bench_memory.run(runs=1000, lines=5000, sample_every=100),
+        "quick": lambda: bench_memory.run(runs=100, lines=1000, sample_every=25),
+    },
+}
+
+LOWER_IS_BETTER = ("_seconds", "_ms", "_bytes")
+HIGHER_IS_BETTER = ("_per_second",)
+# Differences below these are noise, whatever the relative change. Short
+# timings such as a 20 ms cold load of 100 scripts swing by tens of
+# milliseconds between identical runs on a shared machine
+ABSOLUTE_NOISE = {"_seconds": 0.05, "_ms": 5.0, "_bytes": 1024 * 1024}
+# Growth metrics may be zero or negative, so a ratio means nothing; they
+# regress when they grow by more than this many bytes
+GROWTH_MARKER = "_growth_"
+GROWTH_LIMIT_BYTES = 1024 * 1024
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, tolerance):
+    """Return (metric, baseline value, current value) for each regression
+
+    Relative changes are only taken against a positive baseline; from a
+    zero or negative one, any growth beyond the noise limit counts. A
+    timing's noise limit is the larger of ABSOLUTE_NOISE and its spread.
+    """
+    old = flatten(baseline.get("benchmarks", {}))
+    new = flatten(current.get("benchmarks", {}))
+    regressions = []
+    for name, value in new.items():
+        before = old.get(name)
+        if before is None or "_max_" in name:
+            continue
+        if GROWTH_MARKER in name:
+            regressed = value - before > GROWTH_LIMIT_BYTES
+        elif name.endswith(HIGHER_IS_BETTER):
+            regressed = before > 0 and (value - before) / before < -tolerance
+        elif name.endswith(LOWER_IS_BETTER):
+            noise = max(next(limit for suffix, limit in ABSOLUTE_NOISE.items() if name.endswith(suffix)),
+                        old.get(name + benchlib.SPREAD_SUFFIX, 0), new.get(name + benchlib.SPREAD_SUFFIX, 0))
+            regressed = value - before > noise and (before <= 0 or (value - before) / before > tolerance)
+        else:
+            continue
+        if regressed:
+            regressions.append((name, before, value))
+    return regressions
+
+
+def describe_change(before, value):
+    """Relative change against a positive baseline, otherwise the difference"""
+    if before > 0:
+        return f"{(value - before) / before:+.0%}"
+    return f"{value - before:+,.4g}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="use the smaller sizes")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), metavar="SUITE",
+                        help=f"run only these of: {', '.join(SUITES)}")
+    parser.add_argument("--output", metavar="FILE", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="relative change counted as a regression (default: 0.5)")
+    args = parser.parse_args()
+
+    size = "quick" if args.quick else "full"
+    results = {"meta": {**benchlib.metadata(), "size": size}, "benchmarks": {}}
+    for name in args.only or SUITES:
+        print(f"== {name}", file=sys.stderr)
+        start = time.perf_counter()
+        results["benchmarks"][name] = SUITES[name][size]()
+        print(f"   {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    benchlib.write_results(results, output)
+    print(f"Results written to {output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("meta", {}).get("size") != size:
+        print(f"Warning: baseline was measured with size '{baseline.get('meta', {}).get('size')}', "
+              f"not '{size}'", file=sys.stderr)
+    regressions = compare(baseline, results, args.tolerance)
+    if not regressions:
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"{len(regressions)} regressions against {args.compare}:")
+    for name, before, value in regressions:
+        print(f"  {name}: {before:,.4g} -> {value:,.4g} ({describe_change(before, value)})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
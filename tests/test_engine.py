@@ -0,0 +1,108 @@
+"""ExecutionEngine concurrency limits"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yonky_core import ExecutionEngine, RunState  # noqa: E402
+
+RUN_SECONDS = 0.05
+WAIT_SECONDS = 10
+
+
+class ConcurrencyProbe:
+    """Runner that records how many runs are executing at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+        # Runs executing, including this one, when each run started
+        self.started_with = {}
+        self.release = threading.Event()
+
+    def reset_peak(self):
+        with self.lock:
+            self.peak = self.current
+
+    def __call__(self, run):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+            self.started_with[run.run_id] = self.current
+        self.release.wait(WAIT_SECONDS)
+        time.sleep(RUN_SECONDS)
+        with self.lock:
+            self.current -= 1
+        run.status = RunState.SUCCEEDED
+
+
+class ExecutionEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.probe = ConcurrencyProbe()
+        self.engine = ExecutionEngine(self.probe, max_workers=4)
+        self.addCleanup(self.engine.shutdown)
+        self.addCleanup(self.probe.release.set)
+
+    def submit(self, count):
+        done = threading.Semaphore(0)
+        runs = [self.engine.submit(f"script{i}.ps1", {}, on_finish=lambda run: done.release())
+                for i in range(count)]
+        return runs, done
+
+    def wait_for(self, runs, done):
+        for _ in runs:
+            self.assertTrue(done.acquire(timeout=WAIT_SECONDS))
+
+    def wait_until_running(self, count):
+        deadline = time.monotonic() + WAIT_SECONDS
+        while len(self.engine.running) < count:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_runs_up_to_max_workers(self):
+        runs, done = self.submit(8)
+        self.wait_until_running(4)
+        self.probe.release.set()
+        self.wait_for(runs, done)
+        self.assertEqual(self.probe.peak, 4)
+
+    def test_lowering_the_limit_with_runs_queued(self):
+        runs, done = self.submit(12)
+        self.wait_until_running(4)
+        self.engine.set_max_workers(2)
+        self.probe.release.set()
+        self.wait_for(runs, done)
+        # No queued run started while two or more others were running
+        later = [self.probe.started_with[run.run_id] for run in runs[4:]]
+        self.assertLessEqual(max(later), 2)
+        self.assertTrue(all(run.status == RunState.SUCCEEDED for run in runs))
+        self.assertLessEqual(len(self.engine._workers), 2)
+
+    def test_idle_workers_respect_a_lowered_limit(self):
+        self.probe.release.set()
+        runs, done = self.submit(4)
+        self.wait_for(runs, done)
+        # Four idle workers are waiting on the queue
+        self.engine.set_max_workers(1)
+        self.probe.reset_peak()
+        runs, done = self.submit(6)
+        self.wait_for(runs, done)
+        self.assertEqual(self.probe.peak, 1)
+
+    def test_raising_the_limit_starts_workers_for_queued_runs(self):
+        self.engine.set_max_workers(1)
+        runs, done = self.submit(6)
+        self.wait_until_running(1)
+        self.engine.set_max_workers(3)
+        self.wait_until_running(3)
+        self.probe.release.set()
+        self.wait_for(runs, done)
+        self.assertEqual(self.probe.peak, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Opt-in result cache for expensive, read-only scripts
+
+A script opts in with "cache" in its config.json entry: true for the
+default time-to-live or a number of seconds:
+
+    "audit-disks.ps1": {"cache": 900}
+
+Results are keyed by the script's content hash plus everything else that
+shapes its output (arguments, extra environment, command line, target and
+output encoding), so editing the script or changing its inputs is a miss.
+Only successful runs are stored, one JSON file per key under the cache
+directory. The directory is kept under max_bytes by deleting the least
+recently used entries; a hit refreshes the entry's mtime.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from yonky_files import atomic_write
+
+DEFAULT_CACHE_TTL_SECONDS = 600
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+_lock = threading.Lock()
+
+
+def cache_ttl(settings):
+    """TTL in seconds from a script's config entry, or None when not cached"""
+    value = settings.get("cache")
+    if value is True:
+        return DEFAULT_CACHE_TTL_SECONDS
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+        return value
+    return None
+
+
+class OutputCapture:
+    """emit wrapper that also collects (text, tag) lines, up to limit characters"""
+
+    def __init__(self, emit, limit):
+        self.emit = emit
+        self.limit = limit
+        self.lines = []
+        self.size = 0
+        self.overflowed = False
+
+    def __call__(self, text, tag=""):
+        self.emit(text, tag)
+        if self.overflowed:
+            return
+        self.size += len(text) + 1
+        if self.size > self.limit:
+            self.overflowed = True
+            self.lines = []
+            return
+        self.lines.append((text, tag))
+
+
+class ResultCache:
+    """Size-bounded on-disk LRU of run results"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def max_entry_bytes(self):
+        """Outputs bigger than this are not worth evicting everything else for"""
+        return self.max_bytes // 4
+
+    @staticmethod
+    def key(script_path, **inputs):
+        """Cache key for script_path's current content and the run inputs"""
+        digest = hashlib.sha256()
+        with open(script_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest.update(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key, ttl):
+        """Return the stored entry for key if it is younger than ttl seconds"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, script_name, status, returncode, duration, lines):
+        """Store a result, then evict least recently used entries"""
+        entry = {
+            "script": script_name,
+            "created": time.time(),
+            "status": status,
+            "returncode": returncode,
+            "duration": duration,
+            "lines": lines,
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(self._path(key)) as f:
+                json.dump(entry, f, separators=(",", ":"))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries until under max_bytes"""
+        with _lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory)
+                           if entry.is_file() and entry.name.endswith(".json")]
+                stats = [(entry.stat(), entry.path) for entry in entries]
+            except OSError:
+                return
+            total = sum(stat.st_size for stat, _ in stats)
+            stats.sort(key=lambda item: item[0].st_mtime)
+            for stat, path in stats:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= stat.st_size
+
+    def clear(self):
+        """Delete every cached result; return how many there were"""
+        with _lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+            except OSError:
+                return 0
+            for entry in entries:
+                self._remove(entry.path)
+        return len(entries)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,559 @@
+"""Yonky script catalog: incremental discovery of the scripts folder
+
+The catalog keeps a stat cache of every script keyed by its path relative to
+the scripts folder ("network/check-dns.ps1"); sub folders are categories.
+refresh() rescans the tree with os.scandir and returns only what was added,
+removed or changed since the last scan, so the GUI updates just those
+Treeview rows.
+
+Metadata (synopsis, description, parameters) is parsed from the first
+HEADER_BYTES of each script and memoized by content hash. The cache,
+including content hashes and parsed metadata, is persisted to INDEX_FILE.
+On start-up the index is loaded first so the list appears at once, and the
+background refresh then revalidates it against the disk.
+
+Each catalog also maintains a SearchIndex over script names, descriptions
+and tags for the search box.
+"""
+import codecs
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+from yonky_core import BASE_DIR, SCRIPTS_DIR, DEFAULT_CATALOG_POLL_SECONDS, script_settings
+from yonky_files import atomic_write
+from yonky_metrics import CATALOG_REFRESH, CATALOG_SCRIPTS
+
+SCRIPT_EXTENSIONS = ('.ps1', '.bat', '.cmd')
+INDEX_FILE = os.path.join(BASE_DIR, "script_index.json")
+INDEX_VERSION = 2
+HEADER_BYTES = 16 * 1024
+
+
+class ScriptEntry:
+    """Cached stat information, content hash and metadata for one script"""
+
+    __slots__ = ("name", "path", "size", "mtime", "hash", "metadata")
+
+    def __init__(self, name, path, size, mtime, hash=None, metadata=None):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.hash = hash
+        self.metadata = metadata
+
+    @property
+    def category(self):
+        """Sub folder of the scripts folder, '' for top-level scripts"""
+        return self.name.rpartition("/")[0]
+
+    @property
+    def basename(self):
+        return self.name.rpartition("/")[2]
+
+    def same_stat(self, other):
+        return self.size == other.size and self.mtime == other.mtime
+
+    def to_index(self):
+        return {"size": self.size, "mtime": self.mtime, "hash": self.hash, "metadata": self.metadata}
+
+
+class CatalogDiff:
+    """Scripts added, removed and changed by one refresh"""
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f"CatalogDiff(+{len(self.added)} -{len(self.removed)} ~{len(self.changed)})"
+
+
+def read_header(path, size=HEADER_BYTES):
+    """Decode the first size bytes of a script, honouring a UTF-8/16 BOM"""
+    with open(path, "rb") as f:
+        data = f.read(size)
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"),
+                          (codecs.BOM_UTF16_BE, "utf-16-be")):
+        if data.startswith(bom):
+            return data[len(bom):].decode(encoding, errors="replace")
+    return data.decode("utf-8", errors="replace")
+
+
+HELP_BLOCK = re.compile(r"<#(.*?)#>", re.S)
+HELP_KEYWORD = re.compile(r"^\s*\.([A-Za-z]+)[ \t]*(.*)$")
+PARAM_BLOCK = re.compile(r"^\s*param\s*\(", re.I | re.M)
+PARAM_NAME = re.compile(r"\$(\w+)")
+ATTRIBUTE = re.compile(r"\[[^\[\]]*\]")
+
+
+def _split_top_level(text):
+    """Split text on commas that are not nested in brackets or strings"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _is_preamble(text):
+    """True if text holds only comments, attributes and using statements
+
+    Help and the script-level param() block must come before any code;
+    anything later belongs to a function.
+    """
+    for line in HELP_BLOCK.sub("", text).splitlines():
+        line = line.strip()
+        if line and not line.startswith(("#", "[")) and not line.lower().startswith("using "):
+            return False
+    return True
+
+
+def _param_block(text):
+    """Return the text inside the script-level param( ... ) block, or ''"""
+    match = PARAM_BLOCK.search(text)
+    if not match or not _is_preamble(text[:match.start()]):
+        return ""
+    depth = 1
+    for i in range(match.end(), len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[match.end():i]
+    return text[match.end():]
+
+
+def parse_powershell_header(text):
+    """Extract comment-based help and param() names from a .ps1 header"""
+    sections = {}
+    help_match = HELP_BLOCK.search(text)
+    if help_match and _is_preamble(text[:help_match.start()]):
+        help_text = help_match.group(1)
+    else:
+        # Help written as a run of '#' line comments
+        lines = []
+        for line in text.splitlines():
+            if line.lstrip().startswith("#"):
+                lines.append(line.lstrip()[1:])
+            elif line.strip() or lines:
+                break
+        help_text = "\n".join(lines)
+
+    keyword = None
+    for line in help_text.splitlines():
+        match = HELP_KEYWORD.match(line)
+        if match:
+            keyword = match.group(1).upper()
+            if keyword == "PARAMETER":
+                keyword = f"PARAMETER {match.group(2).strip()}"
+            sections.setdefault(keyword, [])
+        elif keyword and line.strip():
+            sections[keyword].append(line.strip())
+
+    parameters = []
+    for part in _split_top_level(_param_block(text)):
+        # With attributes and types removed, the first variable before any
+        # default value is the parameter itself
+        previous = None
+        while previous != part:
+            previous, part = part, ATTRIBUTE.sub("", part)
+        match = PARAM_NAME.search(part.split("=", 1)[0])
+        if match:
+            parameters.append(match.group(1))
+    for keyword in sections:
+        if keyword.startswith("PARAMETER ") and keyword[10:] not in parameters:
+            parameters.append(keyword[10:])
+
+    return {
+        "synopsis": " ".join(sections.get("SYNOPSIS", [])),
+        "description": " ".join(sections.get("DESCRIPTION", [])),
+        "parameters": parameters,
+    }
+
+
+def parse_batch_header(text):
+    """Extract the leading REM / :: comment block of a .bat or .cmd file"""
+    comments = []
+    for line in text.splitlines():
+        stripped = line.strip().lstrip("@")
+        lowered = stripped.lower()
+        if not stripped or lowered.startswith(("echo off", "setlocal")):
+            if comments and not stripped:
+                break
+            continue
+        if lowered == "rem" or lowered.startswith(("rem ", "rem\t")):
+            comments.append(stripped[4:].strip())
+        elif stripped.startswith("::"):
+            comments.append(stripped[2:].strip())
+        else:
+            break
+    comments = [comment for comment in comments if comment]
+    return {
+        "synopsis": comments[0] if comments else "",
+        "description": " ".join(comments[1:]),
+        "parameters": [],
+    }
+
+
+def parse_metadata(path):
+    """Parse script metadata from the header of path"""
+    text = read_header(path)
+    if path.lower().endswith(".ps1"):
+        return parse_powershell_header(text)
+    return parse_batch_header(text)
+
+
+def script_info(entry, config_data):
+    """Display metadata for entry: parsed header merged with config.json
+
+    A config.json entry keyed by the script name (or its relative path) with
+    "name", "description" and "tags" overrides what the header says.
+    """
+    metadata = entry.metadata or {}
+    settings = script_settings(config_data, entry.name)
+    return {
+        "name": settings.get("name") or "",
+        "description": settings.get("description") or metadata.get("synopsis") or metadata.get("description", ""),
+        "parameters": metadata.get("parameters", []),
+        "tags": list(settings.get("tags", [])),
+    }
+
+
+def search_text(entry, config_data):
+    """Lower-cased text the search box matches against
+
+    The synopsis and the full description are both searchable, although
+    only one of them is shown.
+    """
+    metadata = entry.metadata or {}
+    info = script_info(entry, config_data)
+    return " ".join([entry.name, info["name"], info["description"], metadata.get("synopsis", ""),
+                     metadata.get("description", ""), *info["tags"]]).lower()
+
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+class SearchIndex:
+    """Trigram and short-prefix index for substring search over scripts
+
+    Query terms of three or more characters match as substrings, shorter
+    terms match word prefixes, and every term must match. Only the smallest
+    posting list among the terms' trigrams and prefixes is read, then
+    narrowed term by term. While the index is unchanged, a
+    query that extends the previous one (as typing does) only checks the
+    previous result. Safe to update from the catalog's threads while the
+    GUI searches.
+    """
+
+    def __init__(self):
+        self._texts = {}
+        self._trigrams = defaultdict(set)
+        self._prefixes = defaultdict(set)
+        self._lock = threading.Lock()
+        self._version = 0
+        # (index version, query, result) of the last search
+        self._last = None
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, name):
+        return name in self._texts
+
+    @staticmethod
+    def _keys(text):
+        trigrams = {text[i:i + 3] for i in range(len(text) - 2)}
+        prefixes = set()
+        for word in WORD.findall(text):
+            prefixes.add(word[:1])
+            prefixes.add(word[:2])
+        return trigrams, prefixes
+
+    def add(self, name, text):
+        """Index name under text, replacing any previous text"""
+        with self._lock:
+            self._version += 1
+            self._remove(name)
+            self._texts[name] = text
+            trigrams, prefixes = self._keys(text)
+            for key in trigrams:
+                self._trigrams[key].add(name)
+            for key in prefixes:
+                self._prefixes[key].add(name)
+
+    def remove(self, name):
+        with self._lock:
+            self._version += 1
+            self._remove(name)
+
+    def _remove(self, name):
+        text = self._texts.pop(name, None)
+        if text is None:
+            return
+        trigrams, prefixes = self._keys(text)
+        for keys, index in ((trigrams, self._trigrams), (prefixes, self._prefixes)):
+            for key in keys:
+                names = index[key]
+                names.discard(name)
+                if not names:
+                    del index[key]
+
+    def search(self, query):
+        """Return the set of names matching every term, or None for an empty query"""
+        query = query.lower()
+        terms = query.split()
+        if not terms:
+            return None
+        with self._lock:
+            last = self._last
+            # Substring terms only narrow as they grow; prefix terms do not
+            if (last is not None and last[0] == self._version and query.startswith(last[1])
+                    and all(len(term) >= 3 for term in last[1].split())):
+                result = last[2]
+            else:
+                result = min((self._postings(term) for term in terms), key=len)
+            texts = self._texts
+            for term in terms:
+                if len(term) <= 3:
+                    # The posting set is exact for prefixes and single trigrams
+                    result = result & self._postings(term)
+                else:
+                    result = {name for name in result if term in texts[name]}
+                if not result:
+                    break
+            self._last = (self._version, query, result)
+            return set(result)
+
+    def _postings(self, term):
+        """Smallest indexed set of names that holds every match of term"""
+        if len(term) < 3:
+            return self._prefixes.get(term, set())
+        return min((self._trigrams.get(term[i:i + 3], set()) for i in range(len(term) - 2)), key=len)
+
+
+def file_hash(path):
+    """SHA-1 of a file's content"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ScriptCatalog:
+    """Stat cache of the scripts tree with diff-based refresh"""
+
+    def __init__(self, root=SCRIPTS_DIR, index_file=INDEX_FILE, config_data=None):
+        self.root = root
+        self.index_file = index_file
+        self.config_data = config_data if config_data is not None else {}
+        self.entries = {}
+        self.dirty = False
+        self.search_index = SearchIndex()
+        self._metadata_by_hash = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def scan(self):
+        """Return {name: ScriptEntry} for every script currently under root
+
+        Hidden folders (starting with '.') are skipped and symlinked folders
+        are not followed.
+        """
+        found = {}
+        pending = [("", self.root)]
+        while pending:
+            prefix, directory = pending.pop()
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append((prefix + entry.name + "/", entry.path))
+                            continue
+                        if not entry.name.endswith(SCRIPT_EXTENSIONS) or not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    name = prefix + entry.name
+                    found[name] = ScriptEntry(name, entry.path, stat.st_size, stat.st_mtime)
+        return found
+
+    def refresh(self):
+        """Rescan the tree, update the cache and return a CatalogDiff
+
+        Unchanged entries keep their cached hash and metadata. Safe to call
+        from any thread; concurrent refreshes are serialized.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            found = self.scan()
+            diff = CatalogDiff()
+            for name, entry in found.items():
+                cached = self.entries.get(name)
+                if cached is None:
+                    diff.added.append(entry)
+                elif cached.same_stat(entry):
+                    found[name] = cached
+                else:
+                    diff.changed.append(entry)
+            diff.removed = [entry for name, entry in self.entries.items() if name not in found]
+            self.entries = found
+            if diff:
+                self.dirty = True
+            # Entries loaded from the index are searchable after the first refresh
+            for entry in diff.removed:
+                self.search_index.remove(entry.name)
+            for entry in diff.changed:
+                self.search_index.add(entry.name, search_text(entry, self.config_data))
+            for entry in found.values():
+                if entry.name not in self.search_index:
+                    self.search_index.add(entry.name, search_text(entry, self.config_data))
+            CATALOG_REFRESH.observe(time.perf_counter() - started)
+            CATALOG_SCRIPTS.set(len(found))
+            return diff
+
+    def content_hash(self, entry):
+        """Return entry's content hash, computing it on first use"""
+        if entry.hash is None:
+            entry.hash = file_hash(entry.path)
+            self.dirty = True
+        return entry.hash
+
+    def metadata(self, entry):
+        """Return entry's parsed metadata, reusing results for identical content"""
+        if entry.metadata is None:
+            content_hash = self.content_hash(entry)
+            metadata = self._metadata_by_hash.get(content_hash)
+            if metadata is None:
+                metadata = parse_metadata(entry.path)
+                self._metadata_by_hash[content_hash] = metadata
+            entry.metadata = metadata
+            self.dirty = True
+        return entry.metadata
+
+    def update_metadata(self):
+        """Parse metadata for every entry that lacks it and return those entries
+
+        Entries whose file disappeared or cannot be read are skipped and will
+        be retried on the next call.
+        """
+        updated = []
+        for entry in list(self.entries.values()):
+            if entry.metadata is not None:
+                continue
+            try:
+                self.metadata(entry)
+            except OSError:
+                continue
+            self.search_index.add(entry.name, search_text(entry, self.config_data))
+            updated.append(entry)
+        return updated
+
+    def load_index(self):
+        """Populate the cache from INDEX_FILE and return it as a CatalogDiff
+
+        The entries are not checked against the disk; call refresh() to
+        revalidate them. A missing or unreadable index yields an empty diff.
+        """
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return CatalogDiff()
+        if index.get("version") != INDEX_VERSION or index.get("root") != self.root:
+            return CatalogDiff()
+
+        entries = {}
+        for name, data in index.get("scripts", {}).items():
+            path = os.path.join(self.root, *name.split("/"))
+            entries[name] = ScriptEntry(name, path, data["size"], data["mtime"],
+                                        data.get("hash"), data.get("metadata"))
+            if data.get("hash") and data.get("metadata") is not None:
+                self._metadata_by_hash[data["hash"]] = data["metadata"]
+        with self._lock:
+            previous = self.entries
+            self.entries = entries
+        return CatalogDiff(added=[entry for name, entry in entries.items() if name not in previous])
+
+    def save_index(self):
+        """Write the cache to INDEX_FILE if it changed since the last save"""
+        with self._lock:
+            if not self.dirty:
+                return
+            index = {
+                "version": INDEX_VERSION,
+                "root": self.root,
+                "scripts": {name: entry.to_index() for name, entry in self.entries.items()},
+            }
+            self.dirty = False
+        try:
+            with atomic_write(self.index_file) as f:
+                json.dump(index, f, separators=(",", ":"))
+        except OSError:
+            self.dirty = True
+
+
+class CatalogWatcher:
+    """Polls a ScriptCatalog on a background thread and reports non-empty diffs
+
+    on_diff(diff) is called from the watcher thread.
+    """
+
+    def __init__(self, catalog, on_diff, interval=DEFAULT_CATALOG_POLL_SECONDS):
+        self.catalog = catalog
+        self.on_diff = on_diff
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._poll, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            try:
+                diff = self.catalog.refresh()
+            except OSError:
+                continue
+            if diff:
+                diff.changed += [entry for entry in self.catalog.update_metadata()
+                                 if entry not in diff.added]
+                self.catalog.save_index()
+                self.on_diff(diff)
@@ -0,0 +1,362 @@
+"""Headless Yonky: run scripts from scheduled jobs and CI without Tk
+
+    python Yonky_0.9.py run check-cpu.ps1 cleanup.ps1 --parallel 2 --json
+    python Yonky_0.9.py pipeline nightly [--parallel N] [--json]
+    python Yonky_0.9.py fanout cleanup.ps1 lab web01 [--parallel N] [--transport T] [--json]
+    python Yonky_0.9.py stats [script...] [--json]
+    python Yonky_0.9.py clear-cache
+
+run, pipeline and fanout take --records FILE to export the structured
+records of all their runs to FILE (.csv for CSV, otherwise JSON). They
+also serve or write metrics when "metrics_port" or "metrics_file" is set
+in config.json; the metrics file is written once more on exit.
+
+Output is streamed as it arrives, prefixed with the run title when more than
+one script is given. With --json the output goes to stderr and stdout carries
+only the JSON summary. The exit status is 0 when every run succeeded, 1 when
+any run failed, 2 for usage errors and 130 when interrupted. Ctrl+C (or
+SIGTERM) cancels the runs and stops their process trees; a second Ctrl+C
+exits without waiting.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+from yonky_cache import ResultCache
+from yonky_core import (
+    SCRIPTS_DIR,
+    CACHE_DIR,
+    OUTPUT_PUMP_INTERVAL_MS,
+    ExecutionEngine,
+    RunState,
+    load_config,
+    run_script,
+    shutdown_host_pool,
+)
+from yonky_history import RunHistory, format_time
+from yonky_metrics import start_exporters, stop_exporters
+from yonky_pipeline import PipelineError, PipelineRun, load_pipelines
+from yonky_records import export_records
+from yonky_remote import FanOut, TransportError, load_inventory, resolve_targets
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="Yonky_0.9.py", description="Yonky - PowerShell Script Launcher")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run scripts without the GUI")
+    run_parser.add_argument("scripts", nargs="+", metavar="script",
+                            help="script name in the scripts folder, or a path")
+    run_parser.add_argument("--parallel", type=int, metavar="N",
+                            help="maximum concurrent runs (default: max_concurrency from config.json)")
+    run_parser.add_argument("--json", action="store_true",
+                            help="print a JSON summary on stdout, stream output to stderr")
+    run_parser.add_argument("--no-cache", action="store_true",
+                            help="run scripts even when a cached result is available")
+    add_records_argument(run_parser)
+
+    pipeline_parser = commands.add_parser("pipeline", help="run a pipeline defined in config.json")
+    pipeline_parser.add_argument("name", nargs="?", help="pipeline name; omit to list the pipelines")
+    pipeline_parser.add_argument("--parallel", type=int, metavar="N",
+                                 help="maximum concurrent steps (default: the pipeline's concurrency)")
+    pipeline_parser.add_argument("--json", action="store_true",
+                                 help="print a JSON summary on stdout, stream output to stderr")
+    add_records_argument(pipeline_parser)
+
+    fanout_parser = commands.add_parser("fanout", help="run a script on many target hosts")
+    fanout_parser.add_argument("script", help="script name in the scripts folder")
+    fanout_parser.add_argument("targets", nargs="*", metavar="target",
+                               help="inventory group or host name (default: every host in targets.txt)")
+    fanout_parser.add_argument("--parallel", type=int, metavar="N",
+                               help="maximum hosts at once (default: fanout_parallel from config.json)")
+    fanout_parser.add_argument("--transport", help="winrm, ssh, local (default: transport from config.json)")
+    fanout_parser.add_argument("--json", action="store_true",
+                               help="print per-host results as JSON on stdout, stream output to stderr")
+    add_records_argument(fanout_parser)
+
+    stats_parser = commands.add_parser("stats", help="show run history statistics")
+    stats_parser.add_argument("scripts", nargs="*", metavar="script", help="limit to these scripts")
+    stats_parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+
+    commands.add_parser("clear-cache", help="delete every cached script result")
+    return parser
+
+
+def add_records_argument(parser):
+    parser.add_argument("--records", metavar="FILE",
+                        help="export the runs' structured records to FILE (.csv or .json)")
+
+
+def write_records(runs, path):
+    """Export the records of runs to path; return False if that failed"""
+    runs = [run for run in runs if run.records.count]
+    try:
+        count = export_records([(run.title, run.records) for run in runs], path)
+    except (OSError, ValueError) as e:
+        print(f"Could not export records: {e}", file=sys.stderr)
+        return False
+    print(f"{count} records from {len(runs)} runs exported to {path}", file=sys.stderr)
+    return True
+
+
+def run_summary(run):
+    """Machine-readable result of a finished run"""
+    return {
+        "id": run.run_id,
+        "script": run.script_name,
+        "status": run.status,
+        "exit_code": run.returncode,
+        "cached": run.cached,
+        "records": run.records.count,
+        "start": run.start_time,
+        "end": run.end_time,
+        "duration": round(run.duration, 3),
+        "log": run.log.path if run.log is not None else None,
+    }
+
+
+def stream_output(runs, out, prefixed):
+    """Write everything queued on the runs to out"""
+    for run in runs:
+        records = run.output.drain()
+        if not records:
+            continue
+        prefix = f"[{run.title}] " if prefixed else ""
+        out.write("".join(prefix + (stamp or "") + text for stamp, text, _ in records))
+    out.flush()
+
+
+def handle_interrupts(cancel, interrupted):
+    """Call cancel() on SIGINT/SIGTERM; return the old handlers"""
+    def on_signal(signum, frame):
+        if interrupted:
+            raise KeyboardInterrupt
+        interrupted.append(signum)
+        print("Interrupted, cancelling runs...", file=sys.stderr)
+        cancel()
+
+    signals = [signal.SIGINT, signal.SIGTERM]
+    if hasattr(signal, "SIGBREAK"):
+        signals.append(signal.SIGBREAK)
+    return {signum: signal.signal(signum, on_signal) for signum in signals}
+
+
+def run_command(args):
+    config_data = load_config()
+    missing = [name for name in args.scripts if not os.path.isfile(os.path.join(SCRIPTS_DIR, name))]
+    if missing:
+        for name in missing:
+            print(f"Script not found: {name}", file=sys.stderr)
+        return 2
+
+    parallel = args.parallel or config_data.get("max_concurrency", 1)
+    engine = ExecutionEngine(lambda run: run_script(run, config_data), parallel, history=RunHistory())
+    out = sys.stderr if args.json else sys.stdout
+    prefixed = len(args.scripts) > 1
+
+    interrupted = []
+    previous_handlers = handle_interrupts(engine.cancel_all, interrupted)
+    start_time = time.time()
+    runs = [engine.submit(name, config_data, force=args.no_cache) for name in args.scripts]
+    try:
+        while not all(run.finished for run in runs):
+            stream_output(runs, out, prefixed)
+            time.sleep(OUTPUT_PUMP_INTERVAL_MS / 1000)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        stream_output(runs, out, prefixed)
+        engine.shutdown()
+        shutdown_host_pool()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    failed = [run for run in runs if run.status != RunState.SUCCEEDED]
+    exported = not args.records or write_records(runs, args.records)
+    if args.json:
+        json.dump({
+            "duration": round(time.time() - start_time, 3),
+            "succeeded": len(runs) - len(failed),
+            "failed": len(failed),
+            "runs": [run_summary(run) for run in runs],
+        }, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if interrupted:
+        return 130
+    return 1 if failed or not exported else 0
+
+
+def pipeline_command(args):
+    config_data = load_config()
+    try:
+        pipelines = load_pipelines(config_data)
+    except PipelineError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not args.name:
+        for name, pipeline in sorted(pipelines.items()):
+            print(f"{name}: {' '.join(step.name for step in pipeline.steps)}")
+        return 0
+    pipeline = pipelines.get(args.name)
+    if pipeline is None:
+        print(f"Pipeline not found: {args.name}", file=sys.stderr)
+        return 2
+    missing = pipeline.missing_scripts()
+    if missing:
+        for name in missing:
+            print(f"Script not found: {name}", file=sys.stderr)
+        return 2
+
+    workers = args.parallel or pipeline.concurrency or config_data.get("max_concurrency", 1)
+    engine = ExecutionEngine(lambda run: run_script(run, config_data), workers, history=RunHistory())
+    out = sys.stderr if args.json else sys.stdout
+    pipeline_run = PipelineRun(pipeline, engine, config_data, args.parallel)
+
+    interrupted = []
+    previous_handlers = handle_interrupts(pipeline_run.cancel, interrupted)
+    try:
+        pipeline_run.start()
+        while not pipeline_run.wait(OUTPUT_PUMP_INTERVAL_MS / 1000):
+            stream_output(list(pipeline_run.runs.values()), out, True)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        stream_output(list(pipeline_run.runs.values()), out, True)
+        engine.shutdown()
+        shutdown_host_pool()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    exported = not args.records or write_records(pipeline_run.runs.values(), args.records)
+    if args.json:
+        steps = []
+        for step in pipeline.steps:
+            run = pipeline_run.runs.get(step.name)
+            steps.append({
+                "step": step.name,
+                "status": pipeline_run.step_status(step.name),
+                "run": run_summary(run) if run is not None else None,
+            })
+        json.dump({
+            "pipeline": pipeline.name,
+            "status": pipeline_run.status,
+            "duration": round(pipeline_run.duration, 3),
+            "steps": steps,
+        }, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print(f"Pipeline '{pipeline.name}' {pipeline_run.status} in {pipeline_run.duration:.2f} seconds")
+        for line in pipeline_run.summary():
+            print(f"  {line}")
+    if interrupted:
+        return 130
+    return 0 if pipeline_run.status == RunState.SUCCEEDED and exported else 1
+
+
+def print_table(rows):
+    """Print rows of strings as left-aligned columns"""
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def fanout_command(args):
+    config_data = load_config()
+    if not os.path.isfile(os.path.join(SCRIPTS_DIR, args.script)):
+        print(f"Script not found: {args.script}", file=sys.stderr)
+        return 2
+    hosts = resolve_targets(load_inventory(config_data.get("targets_file") or None), args.targets)
+    if not hosts:
+        print("No targets: list hosts in targets.txt or on the command line", file=sys.stderr)
+        return 2
+
+    out = sys.stderr if args.json else sys.stdout
+    fanout = FanOut(args.script, hosts, config_data, lambda run: run_script(run, config_data),
+                    args.parallel, args.transport, history=RunHistory())
+    interrupted = []
+    previous_handlers = handle_interrupts(fanout.cancel, interrupted)
+    try:
+        fanout.start()
+        while not fanout.wait(OUTPUT_PUMP_INTERVAL_MS / 1000):
+            stream_output(fanout.runs.values(), out, True)
+    except TransportError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        stream_output(fanout.runs.values(), out, True)
+        fanout.engine.shutdown()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+    exported = not args.records or write_records(fanout.runs.values(), args.records)
+    if args.json:
+        json.dump({
+            "script": args.script,
+            "counts": fanout.counts(),
+            "hosts": fanout.results(),
+        }, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        rows = [("Host", "Status", "Exit", "Duration", "Last output")]
+        for result in fanout.results():
+            exit_code = "" if result["exit_code"] is None else str(result["exit_code"])
+            rows.append((result["host"], result["status"], exit_code, f"{result['duration']:.2f}s",
+                         result["last_output"][:60]))
+        print_table(rows)
+        print(fanout.summary_text())
+    if interrupted:
+        return 130
+    succeeded = all(run.status == RunState.SUCCEEDED for run in fanout.runs.values())
+    return 0 if succeeded and exported else 1
+
+
+def stats_command(args):
+    stats = RunHistory().script_stats(args.scripts)
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+    if not stats:
+        print("No runs recorded")
+        return 0
+
+    def seconds(value):
+        return "" if value is None else f"{value:.2f}s"
+
+    rows = [("Script", "Runs", "Failed", "p50", "p95", "Last run", "Last status")]
+    for item in stats:
+        rows.append((item["script"], str(item["runs"]), f"{item['failure_rate']:.0%}",
+                     seconds(item["p50"]), seconds(item["p95"]),
+                     format_time(item["last_run"]), item["last_status"] or ""))
+    print_table(rows)
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "stats":
+        return stats_command(args)
+    if args.command == "clear-cache":
+        print(f"Cleared {ResultCache(CACHE_DIR).clear()} cached results")
+        return 0
+
+    exporters = start_exporters(load_config(), lambda message: print(message, file=sys.stderr))
+    try:
+        if args.command == "run":
+            return run_command(args)
+        if args.command == "pipeline":
+            return pipeline_command(args)
+        if args.command == "fanout":
+            return fanout_command(args)
+    finally:
+        stop_exporters(exporters)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""config.json shared by several launcher instances
+
+ConfigStore keeps one instance's config_data and config.json in step:
+
+- Saves are debounced: schedule_save() coalesces a burst of changes into
+  one write SAVE_DELAY_SECONDS later, and flush() writes at once.
+- Saves merge: only the keys this instance changed since it last loaded or
+  saved are written on top of the file's current contents, so settings
+  saved meanwhile by another instance survive.
+- Saves are atomic (temp file and rename), so a reader never sees a
+  truncated file.
+- An edit by another instance or by hand is noticed by the file's mtime
+  and size and reloaded into config_data in place, keeping unsaved local
+  changes. watch() checks in the background.
+"""
+import copy
+import os
+import sys
+import threading
+
+from yonky_core import (
+    CONFIG_FILE,
+    DEFAULT_CONFIG,
+    DEFAULT_CONFIG_POLL_SECONDS,
+    ConfigError,
+    read_config,
+    write_config,
+)
+
+SAVE_DELAY_SECONDS = 1.0
+# A config.json that cannot be parsed when saving is moved aside to this
+BROKEN_SUFFIX = ".broken"
+
+_MISSING = object()
+
+
+def _file_state(path):
+    """(mtime, size) of path, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigStore:
+    """The configuration of one launcher instance, synced with config.json
+
+    data is the live dict handed to the rest of the application; it is
+    updated in place on reload. on_reload(keys) and on_error(message) are
+    called from whichever thread saved or checked.
+    """
+
+    def __init__(self, path=CONFIG_FILE, on_reload=None, on_error=None, save_delay=SAVE_DELAY_SECONDS):
+        self.path = path
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.save_delay = save_delay
+        self.load_error = None
+        self._lock = threading.RLock()
+        self._timer = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+        self._state = _file_state(path)
+        self._error_state = None
+        try:
+            stored = read_config(path)
+        except ConfigError as e:
+            self.load_error = f"{e}; using the default configuration"
+            self._error_state = self._state
+            stored = {}
+        self.data = {**DEFAULT_CONFIG, **stored}
+        self._saved = copy.deepcopy(self.data)
+
+    def changed_keys(self):
+        """Keys changed in data since the last load, save or reload"""
+        keys = [key for key, value in self.data.items() if self._saved.get(key, _MISSING) != value]
+        keys.extend(key for key in self._saved if key not in self.data)
+        return keys
+
+    def schedule_save(self):
+        """Save once no further change has been scheduled for save_delay seconds"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self.save)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write pending changes now"""
+        return self.save()
+
+    def save(self):
+        """Merge local changes into config.json; return False if that failed"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            changed = self.changed_keys()
+            if not changed and self._state is not None:
+                return True
+
+            try:
+                stored = read_config(self.path)
+            except ConfigError as e:
+                stored = None
+                broken = self.path + BROKEN_SUFFIX
+                try:
+                    os.replace(self.path, broken)
+                except OSError:
+                    pass
+                else:
+                    self._report(f"{e}; moved it to {broken}")
+
+            if stored is None or _file_state(self.path) is None:
+                merged = copy.deepcopy(self.data)
+            else:
+                merged = stored
+                for key in changed:
+                    if key in self.data:
+                        merged[key] = self.data[key]
+                    else:
+                        merged.pop(key, None)
+
+            try:
+                write_config(merged, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                self._report(f"Could not save config: {e}")
+                return False
+            self._state = _file_state(self.path)
+            reloaded = self._apply(merged)
+        self._reloaded(reloaded)
+        return True
+
+    def check(self):
+        """Reload config.json if it changed on disk; return the reloaded keys"""
+        state = _file_state(self.path)
+        with self._lock:
+            if state is None or state == self._state:
+                return []
+            try:
+                stored = read_config(self.path)
+            except ConfigError as e:
+                # Possibly half-saved by an editor; reported once per version
+                if state != self._error_state:
+                    self._error_state = state
+                    self._report(f"{e}; keeping the current settings")
+                return []
+            self._state = state
+            reloaded = self._apply(stored)
+        self._reloaded(reloaded)
+        return reloaded
+
+    def _apply(self, stored):
+        """Take stored as the saved state, keeping unsaved local changes"""
+        changed = set(self.changed_keys())
+        saved = {**DEFAULT_CONFIG, **stored}
+        reloaded = []
+        for key, value in saved.items():
+            if key not in changed and self.data.get(key, _MISSING) != value:
+                self.data[key] = copy.deepcopy(value)
+                reloaded.append(key)
+        for key in [key for key in self.data if key not in saved and key not in changed]:
+            del self.data[key]
+            reloaded.append(key)
+        self._saved = copy.deepcopy(saved)
+        return reloaded
+
+    def _reloaded(self, keys):
+        if keys and self.on_reload is not None:
+            self.on_reload(keys)
+
+    def _report(self, message):
+        if self.on_error is not None:
+            self.on_error(message)
+        else:
+            print(message, file=sys.stderr)
+
+    def watch(self, interval=DEFAULT_CONFIG_POLL_SECONDS):
+        """Check for external changes every interval seconds in the background"""
+        if interval and self._watcher is None:
+            self._watcher = threading.Thread(target=self._poll, args=(interval,), daemon=True)
+            self._watcher.start()
+
+    def _poll(self, interval):
+        while not self._stop.wait(interval):
+            self.check()
+
+    def close(self):
+        """Stop watching and write pending changes"""
+        self._stop.set()
+        self.flush()
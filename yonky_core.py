@@ -0,0 +1,928 @@
+"""Yonky execution core: configuration, script runs and output models
+
+Nothing in this module imports tkinter, so it is shared by the GUI
+(yonky_gui.py) and the headless command line (yonky_cli.py).
+"""
+import os
+import sys
+import threading
+import queue
+import json
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+
+from yonky_cache import DEFAULT_CACHE_MAX_BYTES, OutputCapture, ResultCache, cache_ttl
+from yonky_files import atomic_write
+from yonky_hosts import (
+    DEFAULT_HOST_POOL_SIZE,
+    DEFAULT_HOST_MAX_RUNS,
+    DEFAULT_HOST_IDLE_SECONDS,
+    HostError,
+    HostPool,
+    powershell_host_command,
+    python_host_command,
+)
+from yonky_metrics import (
+    DEFAULT_METRICS_INTERVAL_SECONDS,
+    OUTPUT_BYTES,
+    OUTPUT_LINES,
+    RUN_DURATION,
+    RUN_QUEUE_WAIT,
+    RUNS_ACTIVE,
+    RUNS_FINISHED,
+    RUNS_QUEUED,
+    RUNS_SUBMITTED,
+)
+from yonky_pipes import spawn
+from yonky_process import (
+    DEFAULT_KILL_GRACE_SECONDS,
+    kill_leftovers,
+    process_group_kwargs,
+    terminate_tree,
+)
+from yonky_records import (
+    DEFAULT_RECORDS_VIEW_LIMIT,
+    JSON_RECORDS,
+    RecordParser,
+    RunRecords,
+    records_path,
+)
+
+if getattr(sys, "frozen", False):
+    BASE_DIR = os.path.dirname(sys.executable)
+else:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
+CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+LOGS_DIR = os.path.join(BASE_DIR, "logs")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+# Output pump: reader threads enqueue, the Tk main loop drains at a capped rate
+OUTPUT_PUMP_INTERVAL_MS = 50
+OUTPUT_MAX_LINES_PER_PUMP = 2000
+
+# Output pane retention; everything beyond it only lives in the per-run logs
+DEFAULT_OUTPUT_MAX_LINES = 10000
+DEFAULT_OUTPUT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_RUN_LOG_RETENTION = 200
+
+# Execution engine: runs beyond max_concurrency wait in the run queue
+DEFAULT_MAX_CONCURRENCY = 4
+# Fan-out runs one script on many targets, this many hosts at a time
+DEFAULT_FANOUT_PARALLEL = 16
+
+# Scripts still running after this many seconds are stopped (per-script
+# "timeout" in config.json overrides it; 0 means no limit)
+SCRIPT_TIMEOUT = 300
+# The pipes get this long to drain after a script exits
+READER_GRACE_SECONDS = 2
+
+# Script catalog is rescanned in the background this often (0 disables)
+DEFAULT_CATALOG_POLL_SECONDS = 5
+# config.json is checked for edits by other instances this often (0 disables)
+DEFAULT_CONFIG_POLL_SECONDS = 2
+
+DEFAULT_CONFIG = {
+    "recent_scripts": [],
+    "auto_scroll": True,
+    "show_timestamps": True,
+    "execution_policy": "Bypass",
+    "output_max_lines": DEFAULT_OUTPUT_MAX_LINES,
+    "output_max_bytes": DEFAULT_OUTPUT_MAX_BYTES,
+    "run_log_retention": DEFAULT_RUN_LOG_RETENTION,
+    "max_concurrency": DEFAULT_MAX_CONCURRENCY,
+    "script_timeout": SCRIPT_TIMEOUT,
+    "kill_grace_seconds": DEFAULT_KILL_GRACE_SECONDS,
+    "output_encoding": "",
+    "targets_file": "",
+    "transport": "winrm",
+    "fanout_parallel": DEFAULT_FANOUT_PARALLEL,
+    "cache_max_bytes": DEFAULT_CACHE_MAX_BYTES,
+    "records_view_limit": DEFAULT_RECORDS_VIEW_LIMIT,
+    "catalog_poll_seconds": DEFAULT_CATALOG_POLL_SECONDS,
+    "config_poll_seconds": DEFAULT_CONFIG_POLL_SECONDS,
+    "metrics_port": 0,
+    "metrics_file": "",
+    "metrics_interval": DEFAULT_METRICS_INTERVAL_SECONDS,
+    "warm_hosts": False,
+    "warm_host_command": "powershell",
+    "warm_host_pool_size": DEFAULT_HOST_POOL_SIZE,
+    "warm_host_max_runs": DEFAULT_HOST_MAX_RUNS,
+    "warm_host_idle_seconds": DEFAULT_HOST_IDLE_SECONDS
+}
+
+
+def script_settings(config_data, script_name):
+    """Per-script entry of config.json, keyed by relative path or file name"""
+    settings = config_data.get(script_name) or config_data.get(script_name.rpartition("/")[2])
+    return settings if isinstance(settings, dict) else {}
+
+
+class ConfigError(Exception):
+    """config.json exists but cannot be read or is not a JSON object"""
+
+
+def read_config(path=CONFIG_FILE):
+    """Return the settings stored in path, or {} when it does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Could not read {path}: {e}") from e
+    if not isinstance(stored, dict):
+        raise ConfigError(f"Could not read {path}: not a JSON object")
+    return stored
+
+
+def write_config(config_data, path=CONFIG_FILE):
+    """Replace path atomically, so no reader ever sees a partial file"""
+    with atomic_write(path) as f:
+        json.dump(config_data, f, indent=2)
+
+
+def load_config():
+    """Load application configuration
+
+    An unreadable config.json is reported on stderr and the defaults are
+    used; the file itself is left alone.
+    """
+    try:
+        stored = read_config()
+    except ConfigError as e:
+        print(f"{e}; using the default configuration", file=sys.stderr)
+        stored = {}
+    return {**DEFAULT_CONFIG, **stored}
+
+
+class OutputQueue:
+    """Thread-safe queue of output lines drained by the Tk main loop"""
+
+    def __init__(self):
+        self._lines = deque()
+        self._stamp_second = None
+        self._stamp_text = ""
+
+    def _timestamp(self):
+        """Return the '[HH:MM:SS] ' prefix, formatting at most once per second"""
+        now = int(time.time())
+        if now != self._stamp_second:
+            self._stamp_text = f"[{datetime.fromtimestamp(now).strftime('%H:%M:%S')}] "
+            self._stamp_second = now
+        return self._stamp_text
+
+    def put(self, message, tag="", timestamps=True):
+        """Queue a line; safe to call from any thread"""
+        stamp = self._timestamp() if timestamps else None
+        self._lines.append((stamp, message + "\n", tag))
+
+    def __len__(self):
+        return len(self._lines)
+
+    def drain(self, max_lines=OUTPUT_MAX_LINES_PER_PUMP):
+        """Pop up to max_lines queued (stamp, text, tag) records"""
+        records = []
+        popleft = self._lines.popleft
+        for _ in range(max_lines):
+            try:
+                records.append(popleft())
+            except IndexError:
+                break
+        return records
+
+    def discard(self, count):
+        """Drop the oldest count lines without rendering them"""
+        popleft = self._lines.popleft
+        for _ in range(count):
+            try:
+                popleft()
+            except IndexError:
+                break
+
+
+def insert_args(records):
+    """Coalesce records into flat Text.insert arguments
+
+    Returns a (chars, tag, chars, tag, ...) sequence; consecutive runs with the
+    same tag are joined into one chunk so a whole pump is a single insert.
+    """
+    args = []
+    parts = []
+    current_tag = None
+    for stamp, text, tag in records:
+        if stamp is not None:
+            if current_tag != "timestamp":
+                if parts:
+                    args += ("".join(parts), current_tag)
+                parts = []
+                current_tag = "timestamp"
+            parts.append(stamp)
+        if tag != current_tag:
+            if parts:
+                args += ("".join(parts), current_tag)
+            parts = []
+            current_tag = tag
+        parts.append(text)
+    if parts:
+        args += ("".join(parts), current_tag)
+    return args
+
+
+class OutputBuffer:
+    """Bounded model of the Output pane; the oldest lines are evicted first
+
+    Each record is one rendered line. Size is measured in characters of the
+    stamp plus text, which is close enough to bytes for capping memory.
+    """
+
+    def __init__(self, max_lines=DEFAULT_OUTPUT_MAX_LINES, max_bytes=DEFAULT_OUTPUT_MAX_BYTES):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._records = deque()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def size(self):
+        return self._bytes
+
+    def extend(self, records):
+        """Append records and return how many text lines were evicted"""
+        for record in records:
+            self._records.append(record)
+            self._bytes += len(record[1]) + len(record[0] or "")
+        evicted = 0
+        while self._records and (len(self._records) > self.max_lines or self._bytes > self.max_bytes):
+            stamp, text, _ = self._records.popleft()
+            self._bytes -= len(text) + len(stamp or "")
+            evicted += text.count("\n")
+        return evicted
+
+    def clear(self):
+        self._records.clear()
+        self._bytes = 0
+
+    def text(self):
+        """Return the retained output as a single string"""
+        return "".join((stamp or "") + text for stamp, text, _ in self._records)
+
+
+def render_output(output_queue, output_buffer, output_box=None, auto_scroll=True):
+    """Move queued lines into a bounded buffer and its Text widget, if any
+
+    One step of the GUI's output pump, shared with the output benchmark.
+    Returns the drained (stamp, text, tag) records and how many older lines
+    were dropped without being rendered.
+    """
+    # Lines that would be evicted straight away are only kept in the run logs
+    dropped = max(0, len(output_queue) - output_buffer.max_lines)
+    if dropped:
+        output_queue.discard(dropped)
+
+    records = output_queue.drain()
+    if records:
+        evicted = output_buffer.extend(records)
+        if output_box is not None:
+            output_box.insert("end", *insert_args(records))
+            if evicted:
+                output_box.delete("1.0", f"{evicted + 1}.0")
+            if auto_scroll:
+                output_box.see("end")
+    return records, dropped
+
+
+class RunLog:
+    """Full, unbounded output of one run spilled to a file under LOGS_DIR"""
+
+    def __init__(self, script_name, retention=DEFAULT_RUN_LOG_RETENTION, target=None):
+        """retention None leaves older logs alone"""
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        if retention is not None:
+            self.prune(retention)
+        stem = os.path.splitext(os.path.basename(script_name))[0]
+        if target:
+            stem += "-" + "".join(c if c.isalnum() or c in ".-_" else "_" for c in target)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(LOGS_DIR, f"{stem}-{stamp}-{os.getpid()}-{threading.get_ident()}.log")
+        self._file = open(self.path, "w", encoding="utf-8", errors="replace")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def prune(retention):
+        """Delete the oldest run logs (and their records) so at most retention - 1 remain
+
+        Logs of runs that are still queued or running are never deleted.
+        """
+        in_use = {run.log.path for run in active_runs() if run.log is not None}
+        try:
+            logs = [entry for entry in os.scandir(LOGS_DIR)
+                    if entry.is_file() and entry.name.endswith(".log") and entry.path not in in_use]
+        except OSError:
+            return
+        logs.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in logs[:max(0, len(logs) - retention + 1)]:
+            for path in (entry.path, records_path(entry.path)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def write(self, message):
+        """Append a line; safe to call from the stdout and stderr readers"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(message + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RunState:
+    """State and output of a single script run
+
+    The run owns its own output queue and bounded buffer so concurrent runs
+    render into separate tabs; everything is also written to its RunLog.
+    Structured records the script emits are collected in records.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    TIMED_OUT = "timed out"
+    CANCELLED = "cancelled"
+    ERROR = "error"
+
+    def __init__(self, run_id, script_name, config_data, args=(), env=None, on_finish=None,
+                 command=None, target=None, force=False):
+        self.run_id = run_id
+        self.script_name = script_name
+        self.args = list(args)
+        self.env = dict(env or {})
+        self.on_finish = on_finish
+        self.command = command
+        self.target = target
+        self.force = force
+        self.cached = False
+        self.status = RunState.QUEUED
+        self.returncode = None
+        self.submitted = time.time()
+        self.start_time = None
+        self.end_time = None
+        self.timestamps = config_data.get("show_timestamps", True)
+        self.output = OutputQueue()
+        self.buffer = OutputBuffer(
+            config_data.get("output_max_lines", DEFAULT_OUTPUT_MAX_LINES),
+            config_data.get("output_max_bytes", DEFAULT_OUTPUT_MAX_BYTES),
+        )
+        self.log = None
+        self.records = RunRecords(config_data.get("records_view_limit", DEFAULT_RECORDS_VIEW_LIMIT))
+        self.output_lines = 0
+        self.output_bytes = 0
+        # The script's own lines, without headers and launcher notices
+        self.script_lines = 0
+        self.script_bytes = 0
+        self.last_output = ""
+        self.cancel_requested = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status not in (RunState.QUEUED, RunState.RUNNING)
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def title(self):
+        if self.target:
+            return f"{self.script_name}@{self.target} #{self.run_id}"
+        return f"{self.script_name} #{self.run_id}"
+
+    def emit(self, message, tag=""):
+        """Record a line of output; safe to call from any thread"""
+        self.output_lines += 1
+        self.output_bytes += len(message) + 1
+        self.output.put(message, tag, self.timestamps)
+        if self.log is not None:
+            self.log.write(message)
+
+
+# Every live engine, so metrics and diagnostics see the runs of all of them
+_engines = weakref.WeakSet()
+# Output totals of finished runs. A run's totals move here under
+# _output_lock in the same step that removes it from its engine, and
+# readers hold the lock too, so every line is counted exactly once.
+# Lock order: _output_lock, then an engine's lock.
+_finished_output = {"output_lines": 0, "output_bytes": 0}
+_output_lock = threading.Lock()
+
+
+def active_runs():
+    """Queued and running runs of every execution engine"""
+    runs = []
+    for engine in list(_engines):
+        with engine._lock:
+            runs.extend(engine._active.values())
+    return runs
+
+
+def _output_total(attribute):
+    """attribute summed over finished and active runs, in one snapshot"""
+    with _output_lock:
+        total = _finished_output[attribute]
+        for engine in list(_engines):
+            with engine._lock:
+                total += sum(getattr(run, attribute) for run in engine._active.values())
+    return total
+
+
+def _count_status(status):
+    return sum(1 for run in active_runs() if run.status == status)
+
+
+RUNS_ACTIVE.set_function(lambda: _count_status(RunState.RUNNING))
+RUNS_QUEUED.set_function(lambda: _count_status(RunState.QUEUED))
+OUTPUT_LINES.add_function(lambda: _output_total("output_lines"))
+OUTPUT_BYTES.add_function(lambda: _output_total("output_bytes"))
+
+
+class ExecutionEngine:
+    """Bounded worker pool that executes queued runs
+
+    submit() only enqueues; up to max_workers daemon threads pick runs off the
+    queue and hand them to runner(run). on_change(run) is called from worker
+    threads whenever a run changes state, and finished runs are recorded in
+    history (a yonky_history.RunHistory) when one is given.
+    """
+
+    def __init__(self, runner, max_workers=DEFAULT_MAX_CONCURRENCY, on_change=None, history=None):
+        self.runner = runner
+        self.max_workers = max(1, int(max_workers))
+        self.on_change = on_change
+        self.history = history
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Signalled when a run stops running, so a worker may start the next
+        self._slot_free = threading.Condition(self._lock)
+        self._running = 0
+        self._workers = []
+        self._active = {}
+        self._next_id = 1
+        _engines.add(self)
+
+    def submit(self, script_name, config_data, args=(), env=None, on_finish=None,
+               command=None, target=None, force=False):
+        """Queue script_name for execution and return its RunState
+
+        args are passed to the script and env is added to its environment.
+        on_finish(run) is called on a worker thread once the run is over,
+        including when it is cancelled before it starts. command replaces
+        the local command line, e.g. with a remote transport for target.
+        force skips the result cache.
+        """
+        with self._lock:
+            run = RunState(self._next_id, script_name, config_data, args, env, on_finish,
+                           command, target, force)
+            self._next_id += 1
+            self._active[run.run_id] = run
+            RUNS_SUBMITTED.inc()
+            self._start_workers()
+        self._queue.put(run)
+        self._notify(run)
+        return run
+
+    def set_max_workers(self, max_workers):
+        """Change how many runs execute at once
+
+        Extra workers start at once for queued runs; when the limit drops,
+        no new run starts until fewer than max_workers are running, and
+        surplus workers retire as they finish their current run.
+        """
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            self._start_workers()
+            self._slot_free.notify_all()
+
+    def _start_workers(self):
+        """Start workers up to the limit; called with the lock held"""
+        while len(self._workers) < min(self.max_workers, len(self._active)):
+            worker = threading.Thread(target=self._work, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def cancel(self, run):
+        """Ask a run to stop; a queued run is dropped before it starts"""
+        with _output_lock, self._lock:
+            run.cancel_requested.set()
+            dropped = run.status == RunState.QUEUED
+            if dropped:
+                run.status = RunState.CANCELLED
+                run.end_time = time.time()
+                self._active.pop(run.run_id, None)
+                self._record_metrics(run)
+                self._slot_free.notify_all()
+        if dropped:
+            self._notify(run)
+            self._finish(run)
+
+    def cancel_all(self):
+        """Cancel every queued and running run"""
+        with self._lock:
+            runs = list(self._active.values())
+        for run in runs:
+            self.cancel(run)
+
+    @property
+    def running(self):
+        with self._lock:
+            return [run for run in self._active.values() if run.status == RunState.RUNNING]
+
+    @property
+    def queued(self):
+        with self._lock:
+            return [run for run in self._active.values() if run.status == RunState.QUEUED]
+
+    def _notify(self, run):
+        if self.on_change is not None:
+            self.on_change(run)
+
+    @staticmethod
+    def _finish(run):
+        if run.on_finish is not None:
+            run.on_finish(run)
+
+    @staticmethod
+    def _record_metrics(run):
+        """Count a finished run; called with _output_lock and the lock held, as it leaves _active"""
+        RUNS_FINISHED.inc(status=run.status)
+        if run.start_time is not None:
+            RUN_DURATION.observe(run.duration)
+        _finished_output["output_lines"] += run.output_lines
+        _finished_output["output_bytes"] += run.output_bytes
+
+    def _work(self):
+        worker = threading.current_thread()
+        while True:
+            with self._lock:
+                if worker in self._workers and len(self._workers) > self.max_workers:
+                    # The limit was lowered; leave the queue to the others
+                    self._workers.remove(worker)
+                    return
+            run = self._queue.get()
+            if run is None:
+                break
+            with self._lock:
+                # A worker that was idle when the limit dropped waits its turn
+                while self._running >= self.max_workers and run.status == RunState.QUEUED:
+                    self._slot_free.wait()
+                if run.status != RunState.QUEUED:
+                    # Cancelled while waiting in the queue
+                    continue
+                self._running += 1
+                run.status = RunState.RUNNING
+                run.start_time = time.time()
+            RUN_QUEUE_WAIT.observe(run.start_time - run.submitted)
+            self._notify(run)
+            try:
+                self.runner(run)
+            except Exception as e:
+                run.emit(f"Exception running '{run.script_name}': {e}", "error")
+                run.status = RunState.ERROR
+            if not run.finished:
+                run.status = RunState.ERROR
+            run.end_time = run.end_time or time.time()
+            with _output_lock, self._lock:
+                self._active.pop(run.run_id, None)
+                self._record_metrics(run)
+                self._running -= 1
+                self._slot_free.notify()
+            if self.history is not None:
+                self.history.record(run)
+            self._notify(run)
+            self._finish(run)
+
+    def shutdown(self):
+        """Stop idle workers once the queue is empty"""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for _ in workers:
+            self._queue.put(None)
+
+
+def build_command(script_path, config_data, args=()):
+    """Return the command line that executes script_path with args"""
+    # Determine execution command based on file extension
+    if script_path.endswith('.ps1'):
+        return ["powershell", "-ExecutionPolicy", config_data.get("execution_policy", "Bypass"), 
+                "-File", script_path, *args]
+    elif script_path.endswith(('.bat', '.cmd')):
+        return [script_path, *args]
+    raise ValueError(f"Unsupported script type: {os.path.basename(script_path)}")
+
+
+def _section_emitter(emit, run):
+    """Wrap emit so the first line of each stream is preceded by its header
+
+    The latest line is also kept as run.last_output and counted in
+    run.script_lines and run.script_bytes. Lines with other tags, such as
+    the launcher's own notices, pass through without a header or a count.
+    """
+    started = set()
+
+    def emit_line(text, tag=""):
+        if tag not in ("", "error"):
+            emit(text, tag)
+            return
+        run.last_output = text
+        run.script_lines += 1
+        run.script_bytes += len(text) + 1
+        if tag not in started:
+            started.add(tag)
+            emit("STDOUT:" if tag == "" else "STDERR:", "info" if tag == "" else "error")
+        emit(text, tag)
+
+    return emit_line
+
+
+def _wait_for_exit(process, cancel_requested, timeout):
+    """Wait for process to exit; return why it must be stopped early, if so"""
+    deadline = time.monotonic() + timeout if timeout else None
+    while process.poll() is None:
+        if cancel_requested.wait(0.1):
+            return RunState.CANCELLED
+        if deadline is not None and time.monotonic() >= deadline:
+            return RunState.TIMED_OUT
+    return None
+
+
+def _run_process(cmd, emit, run, timeout, grace, encoding=None):
+    """Run cmd in a new process group; return (returncode, stop_reason)
+
+    stop_reason is None, RunState.TIMED_OUT or RunState.CANCELLED. Output is
+    read by the shared pipe loop (yonky_pipes) and decoded with encoding. A
+    stopped run has its whole process tree terminated, and the pipes are
+    never waited on forever: descendants that keep them open after the
+    script exits are killed.
+    """
+    env = {**os.environ, **run.env} if run.env else None
+    process = spawn(cmd, emit, encoding, env=env, **process_group_kwargs())
+
+    stop_reason = _wait_for_exit(process, run.cancel_requested, timeout)
+    if stop_reason is not None:
+        terminate_tree(process, grace)
+
+    if not process.wait_for_output(READER_GRACE_SECONDS):
+        emit("Stopping child processes that kept the output open", "info")
+        kill_leftovers(process)
+        if not process.wait_for_output(READER_GRACE_SECONDS):
+            process.close()
+    return process.returncode, stop_reason
+
+
+def _run_warm(pool, script_path, emit, run, timeout, grace):
+    """Run script_path on a warm host from pool; return (returncode, stop_reason)
+
+    The timeout and cancellation also apply while the run waits for a busy
+    pool. On timeout or cancellation the host's process tree is terminated
+    and the host is dropped from the pool.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    done = threading.Event()
+    lock = threading.Lock()
+    stop_reason = []
+    running = []
+
+    def watch():
+        while not done.is_set():
+            cancelled = run.cancel_requested.wait(0.1)
+            expired = deadline is not None and time.monotonic() >= deadline
+            if cancelled or expired:
+                with lock:
+                    if done.is_set():
+                        return
+                    stop_reason.append(RunState.CANCELLED if cancelled else RunState.TIMED_OUT)
+                    host = running[0] if running else None
+                if host is not None:
+                    terminate_tree(host.process, grace)
+                return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    host = None
+    try:
+        host = pool.acquire(stop=lambda: bool(stop_reason))
+        with lock:
+            if host is not None and not stop_reason:
+                running.append(host)
+        if not running:
+            # Stopped before a host became free
+            return None, stop_reason[0]
+        return host.run(script_path, run.args, emit), None
+    except HostError:
+        if stop_reason:
+            return None, stop_reason[0]
+        raise
+    finally:
+        with lock:
+            done.set()
+        if stop_reason:
+            watcher.join()
+        if host is not None:
+            pool.release(host)
+
+
+_host_pool = None
+_host_pool_lock = threading.Lock()
+
+
+def host_command(config_data):
+    """Warm host command from config: a preset name or an explicit list"""
+    command = config_data.get("warm_host_command") or "powershell"
+    if isinstance(command, list):
+        return command
+    if command == "python":
+        return python_host_command()
+    return powershell_host_command(config_data.get("execution_policy", "Bypass"), command)
+
+
+def get_host_pool(config_data):
+    """Return the shared warm host pool, creating and prewarming it on first use"""
+    global _host_pool
+    with _host_pool_lock:
+        if _host_pool is None:
+            _host_pool = HostPool(
+                host_command(config_data),
+                config_data.get("warm_host_pool_size", DEFAULT_HOST_POOL_SIZE),
+                config_data.get("warm_host_max_runs", DEFAULT_HOST_MAX_RUNS),
+                config_data.get("warm_host_idle_seconds", DEFAULT_HOST_IDLE_SECONDS),
+            )
+            _host_pool.prewarm()
+        return _host_pool
+
+
+def shutdown_host_pool():
+    """Stop all warm hosts"""
+    global _host_pool
+    with _host_pool_lock:
+        pool, _host_pool = _host_pool, None
+    if pool is not None:
+        pool.close()
+
+
+def _replay_cached(run, entry, json_records=False):
+    """Finish run from a cached result instead of executing the script"""
+    emit = run.emit
+    age = time.time() - entry.get("created", 0)
+    emit(f"Cached result from {age:.0f} seconds ago; force a re-run to execute the script again", "info")
+    # The cache holds the raw output, so records are parsed again
+    parser = RecordParser(_section_emitter(emit, run), run.records, json_records)
+    for text, tag in entry.get("lines", []):
+        parser(text, tag)
+    parser.close()
+    run.cached = True
+    run.returncode = entry.get("returncode")
+    run.status = entry.get("status", RunState.SUCCEEDED)
+    run.end_time = time.time()
+    emit(f"=== Cached: {run.script_name} ===", "info")
+    emit(f"Original duration: {entry.get('duration', 0):.2f} seconds", "info")
+    emit("Script completed successfully (cached)", "success")
+
+
+def run_script(run, config_data):
+    """Execute a script for run, streaming its output into run.emit
+
+    Called on an engine worker thread by both the GUI and the headless CLI.
+    With warm_hosts enabled, .ps1 scripts run on a pooled warm host instead
+    of a new PowerShell process. The run log and records file are closed
+    however the run ends, including by an exception.
+    """
+    try:
+        _execute(run, config_data)
+    finally:
+        _close_run_log(run)
+
+
+def _execute(run, config_data):
+    script_name = run.script_name
+    script_path = os.path.join(SCRIPTS_DIR, script_name)
+    emit = run.emit
+
+    # A fan-out prunes once when it has finished, so the logs of its
+    # earlier hosts survive however many hosts it has
+    retention = None if run.target else config_data.get("run_log_retention", DEFAULT_RUN_LOG_RETENTION)
+    try:
+        run.log = RunLog(script_name, retention, run.target)
+    except OSError as e:
+        emit(f"Could not create run log: {e}", "error")
+    else:
+        run.records.path = records_path(run.log.path)
+
+    if run.target:
+        emit(f"Starting execution: {script_name} on {run.target}", "info")
+    else:
+        emit(f"Starting execution: {script_name}", "info")
+
+    settings = script_settings(config_data, script_name)
+    timeout = settings.get("timeout", config_data.get("script_timeout", SCRIPT_TIMEOUT))
+    encoding = settings.get("encoding") or config_data.get("output_encoding")
+    grace = config_data.get("kill_grace_seconds", DEFAULT_KILL_GRACE_SECONDS)
+    json_records = settings.get("records") == JSON_RECORDS
+
+    # Opted-in scripts replay a stored result unless the run is forced
+    ttl = cache_ttl(settings)
+    cache = cache_key = capture = None
+    if ttl:
+        cache = ResultCache(CACHE_DIR, config_data.get("cache_max_bytes", DEFAULT_CACHE_MAX_BYTES))
+        try:
+            cache_key = cache.key(script_path, args=run.args, env=run.env, command=run.command,
+                                  target=run.target, encoding=encoding,
+                                  policy=config_data.get("execution_policy"))
+        except OSError:
+            cache_key = None
+    if cache_key is not None and not run.force:
+        entry = cache.get(cache_key, ttl)
+        if entry is not None:
+            _replay_cached(run, entry, json_records)
+            return
+    # Record lines are diverted before the text output gets its section
+    # headers; the cache keeps the raw lines
+    parser = script_emit = RecordParser(_section_emitter(emit, run), run.records, json_records)
+    if cache_key is not None:
+        script_emit = capture = OutputCapture(parser, cache.max_entry_bytes)
+
+    try:
+        start_time = time.time()
+        # Warm hosts share one environment, so runs with extra variables get
+        # a process of their own
+        if config_data.get("warm_hosts") and script_path.endswith('.ps1') and not run.env and not run.command:
+            returncode, stop_reason = _run_warm(get_host_pool(config_data), script_path,
+                                                script_emit, run, timeout, grace)
+        else:
+            cmd = run.command or build_command(script_path, config_data, run.args)
+            returncode, stop_reason = _run_process(cmd, script_emit, run, timeout, grace, encoding)
+
+        parser.close()
+        end_time = time.time()
+        run.end_time = end_time
+        run.returncode = returncode
+
+        emit(f"=== Executed: {script_name} ===", "info")
+        emit(
+            f"Duration: {end_time - start_time:.2f} seconds",
+            "info",
+        )
+
+        if stop_reason == RunState.TIMED_OUT:
+            run.status = RunState.TIMED_OUT
+            emit(
+                f"Script '{script_name}' timed out after {timeout:g} seconds",
+                "error",
+            )
+        elif stop_reason == RunState.CANCELLED:
+            run.status = RunState.CANCELLED
+            emit(
+                f"Script '{script_name}' was cancelled",
+                "error",
+            )
+        else:
+            if returncode != 0:
+                run.status = RunState.FAILED
+                emit(
+                    f"Exit code: {returncode}",
+                    "error",
+                )
+            else:
+                run.status = RunState.SUCCEEDED
+                emit(
+                    "Script completed successfully",
+                    "success",
+                )
+                if capture is not None and not capture.overflowed:
+                    cache.put(cache_key, script_name, run.status, returncode,
+                              end_time - start_time, capture.lines)
+    except Exception as e:
+        run.status = RunState.ERROR
+        emit(f"Exception running '{script_name}': {e}", "error")
+
+
+def _close_run_log(run):
+    run.records.close()
+    if run.records.count:
+        if run.records.path is not None:
+            run.emit(f"{run.records.count} records saved to {run.records.path}", "info")
+        else:
+            run.emit(f"{run.records.count} records", "info")
+    if run.log is not None:
+        run.log.close()
+        run.emit(f"Full output saved to {run.log.path}", "info")
@@ -0,0 +1,299 @@
+"""Yonky dialog windows, imported when first opened to keep start-up fast"""
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from yonky_core import DEFAULT_OUTPUT_MAX_LINES, DEFAULT_FANOUT_PARALLEL, RunState, active_runs
+from yonky_history import format_time
+from yonky_metrics import METRICS
+from yonky_remote import ALL_TARGETS, FanOut, TransportError, load_inventory, resolve_targets
+
+
+class PreferencesDialog(tk.Toplevel):
+    """Dialog for editing user preferences"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Preferences")
+        self.resizable(False, False)
+
+        # Variables bound to configuration options
+        self.auto_scroll_var = tk.BooleanVar(value=parent.config_data.get("auto_scroll", True))
+        self.timestamps_var = tk.BooleanVar(value=parent.config_data.get("show_timestamps", True))
+        self.exec_policy_var = tk.StringVar(value=parent.config_data.get("execution_policy", "Bypass"))
+        self.max_lines_var = tk.IntVar(value=parent.config_data.get("output_max_lines", DEFAULT_OUTPUT_MAX_LINES))
+
+        # Build UI
+        ttk.Checkbutton(self, text="Auto-scroll output", variable=self.auto_scroll_var).pack(anchor="w", padx=10, pady=5)
+        ttk.Checkbutton(self, text="Show timestamps", variable=self.timestamps_var).pack(anchor="w", padx=10, pady=5)
+
+        exec_frame = ttk.Frame(self)
+        exec_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(exec_frame, text="Execution Policy:").pack(side="left")
+        ttk.Entry(exec_frame, textvariable=self.exec_policy_var, width=20).pack(side="left", padx=(5, 0))
+
+        lines_frame = ttk.Frame(self)
+        lines_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(lines_frame, text="Output line limit:").pack(side="left")
+        ttk.Spinbox(lines_frame, from_=100, to=1000000, increment=1000,
+                    textvariable=self.max_lines_var, width=10).pack(side="left", padx=(5, 0))
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill="x", pady=10)
+        ttk.Button(button_frame, text="OK", command=self.on_ok).pack(side="right", padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side="right")
+
+        self.protocol("WM_DELETE_WINDOW", self.on_ok)
+
+    def on_ok(self):
+        """Save settings and close"""
+        self.parent.config_data["auto_scroll"] = self.auto_scroll_var.get()
+        self.parent.config_data["show_timestamps"] = self.timestamps_var.get()
+        self.parent.config_data["execution_policy"] = self.exec_policy_var.get()
+        try:
+            max_lines = max(100, self.max_lines_var.get())
+        except tk.TclError:
+            max_lines = DEFAULT_OUTPUT_MAX_LINES
+        self.parent.config_data["output_max_lines"] = max_lines
+        self.parent.output_buffer.max_lines = max_lines
+        self.parent.save_config()
+        self.destroy()
+
+
+class StatsDialog(tk.Toplevel):
+    """Window showing per-script timing statistics from the run history"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Run Statistics")
+        self.geometry("760x360")
+
+        columns = ('Runs', 'Failed', 'p50', 'p95', 'Last Run', 'Last Status')
+        self.tree = ttk.Treeview(self, columns=columns, show='tree headings')
+        self.tree.heading('#0', text='Script')
+        self.tree.column('#0', width=220)
+        for column in columns:
+            self.tree.heading(column, text=column)
+            self.tree.column(column, width=80, anchor="e")
+        self.tree.column('Last Run', width=120)
+        self.tree.column('Last Status', width=90, anchor="w")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Refresh", command=self.refresh).pack(side=tk.RIGHT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Reload statistics in the background"""
+        def load():
+            stats = self.parent.history.script_stats()
+            self.parent.call_in_ui(self.show, stats)
+
+        threading.Thread(target=load, daemon=True).start()
+
+    def show(self, stats):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+
+        def seconds(value):
+            return "" if value is None else f"{value:.2f}s"
+
+        for item in stats:
+            self.tree.insert('', tk.END, text=item["script"], values=(
+                item["runs"], f"{item['failure_rate']:.0%}", seconds(item["p50"]), seconds(item["p95"]),
+                format_time(item["last_run"]), item["last_status"] or ""))
+
+
+class FanOutDialog(tk.Toplevel):
+    """Run one script on a group of target hosts and show a per-host grid"""
+
+    def __init__(self, parent, script_name):
+        super().__init__(parent)
+        self.parent = parent
+        self.script_name = script_name
+        self.fanout = None
+        self.title(f"Run on Targets - {script_name}")
+        self.geometry("760x420")
+
+        self.inventory = load_inventory(parent.config_data.get("targets_file") or None)
+        self.targets_var = tk.StringVar(value=ALL_TARGETS)
+        self.parallel_var = tk.IntVar(value=parent.config_data.get("fanout_parallel", DEFAULT_FANOUT_PARALLEL))
+
+        options = ttk.Frame(self)
+        options.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(options, text="Targets:").pack(side=tk.LEFT)
+        ttk.Combobox(options, textvariable=self.targets_var, values=sorted(self.inventory),
+                     width=30).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(options, text="Parallel:").pack(side=tk.LEFT)
+        ttk.Spinbox(options, from_=1, to=256, textvariable=self.parallel_var, width=5).pack(side=tk.LEFT, padx=5)
+        self.start_button = ttk.Button(options, text="Start", command=self.start)
+        self.start_button.pack(side=tk.RIGHT)
+
+        columns = ('Status', 'Exit', 'Duration', 'Last Output')
+        self.tree = ttk.Treeview(self, columns=columns, show='tree headings')
+        self.tree.heading('#0', text='Host')
+        self.tree.column('#0', width=160)
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.tree.column('Status', width=90)
+        self.tree.column('Exit', width=50, anchor="e")
+        self.tree.column('Duration', width=80, anchor="e")
+        self.tree.column('Last Output', width=340)
+        self.tree.tag_configure(RunState.SUCCEEDED, foreground="#2b8a3e")
+        for status in (RunState.FAILED, RunState.TIMED_OUT, RunState.ERROR, RunState.CANCELLED):
+            self.tree.tag_configure(status, foreground="#c92a2a")
+        self.tree.bind('<Double-1>', self.open_log)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.summary = ttk.Label(button_frame, text="Targets are listed in targets.txt ([group] lines start a group)")
+        self.summary.pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Close", command=self.close).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side=tk.RIGHT, padx=5)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def start(self):
+        hosts = resolve_targets(self.inventory, self.targets_var.get().split())
+        if not hosts:
+            messagebox.showwarning("No Targets", "The inventory has no hosts", parent=self)
+            return
+        fanout = FanOut(self.script_name, hosts, self.parent.config_data, self.parent.run_script,
+                        self.parallel_var.get(), history=self.parent.history,
+                        on_change=lambda run: self.parent.call_in_ui(self.update_row, run))
+        try:
+            fanout.start()
+        except (TransportError, OSError) as e:
+            messagebox.showerror("Transport", str(e), parent=self)
+            return
+        self.fanout = fanout
+        self.start_button.config(state=tk.DISABLED)
+        self.tree.delete(*self.tree.get_children())
+        for host, run in fanout.runs.items():
+            self.tree.insert('', tk.END, iid=host, text=host, values=(run.status, "", "", ""))
+        self.parent.log_output(f"Running {self.script_name} on {len(hosts)} targets", "info")
+        self.refresh()
+
+    def update_row(self, run):
+        if not self.winfo_exists() or not self.tree.exists(run.target):
+            return
+        self.tree.item(run.target, tags=(run.status,), values=(
+            run.status,
+            "" if run.returncode is None else run.returncode,
+            f"{run.duration:.2f}s" if run.start_time else "",
+            run.last_output,
+        ))
+
+    def refresh(self):
+        """Keep each run's output bounded and the grid's last output current"""
+        if not self.winfo_exists() or self.fanout is None:
+            return
+        finished = self.fanout.finished
+        for run in self.fanout.runs.values():
+            records = run.output.drain()
+            if records:
+                run.buffer.extend(records)
+                self.update_row(run)
+        self.summary.config(text=self.fanout.summary_text())
+        if finished:
+            self.parent.log_output(f"{self.script_name} on targets: {self.fanout.summary_text()}",
+                                   "success" if set(self.fanout.counts()) == {RunState.SUCCEEDED} else "error")
+            return
+        self.after(500, self.refresh)
+
+    def open_log(self, event=None):
+        selection = self.tree.selection()
+        run = self.fanout.runs.get(selection[0]) if self.fanout and selection else None
+        if run is None or run.log is None:
+            return
+        try:
+            os.startfile(run.log.path)
+        except Exception:
+            messagebox.showinfo("Run Log", run.log.path, parent=self)
+
+    def cancel(self):
+        if self.fanout is not None and not self.fanout.finished:
+            self.fanout.cancel()
+
+    def close(self):
+        if self.fanout is not None and not self.fanout.finished:
+            if not messagebox.askyesno("Runs Active", "Cancel the remaining targets?", parent=self):
+                return
+            self.fanout.cancel()
+        self.destroy()
+
+
+class DiagnosticsDialog(tk.Toplevel):
+    """Live launcher health: metrics and the runs active right now"""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.parent = parent
+        self.title("Diagnostics")
+        self.geometry("820x520")
+
+        paned = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        runs_frame = ttk.LabelFrame(paned, text="Active Runs", padding=5)
+        paned.add(runs_frame, weight=1)
+        columns = ('Status', 'Time', 'Lines', 'Last Output')
+        self.runs_tree = ttk.Treeview(runs_frame, columns=columns, show='tree headings', height=6)
+        self.runs_tree.heading('#0', text='Run')
+        self.runs_tree.column('#0', width=200)
+        for column in columns:
+            self.runs_tree.heading(column, text=column)
+        self.runs_tree.column('Status', width=80)
+        self.runs_tree.column('Time', width=70, anchor="e")
+        self.runs_tree.column('Lines', width=70, anchor="e")
+        self.runs_tree.column('Last Output', width=360)
+        self.runs_tree.pack(fill=tk.BOTH, expand=True)
+
+        metrics_frame = ttk.LabelFrame(paned, text="Metrics", padding=5)
+        paned.add(metrics_frame, weight=2)
+        self.metrics_tree = ttk.Treeview(metrics_frame, columns=('Value',), show='tree headings')
+        self.metrics_tree.heading('#0', text='Metric')
+        self.metrics_tree.heading('Value', text='Value')
+        self.metrics_tree.column('#0', width=330)
+        self.metrics_tree.column('Value', width=420)
+        metrics_scroll = ttk.Scrollbar(metrics_frame, orient=tk.VERTICAL, command=self.metrics_tree.yview)
+        self.metrics_tree.configure(yscrollcommand=metrics_scroll.set)
+        self.metrics_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        metrics_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Copy Metrics", command=self.copy_metrics).pack(side=tk.RIGHT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Redraw both tables, then again after REFRESH_MS while the window is open"""
+        if not self.winfo_exists():
+            return
+        self.runs_tree.delete(*self.runs_tree.get_children())
+        for run in sorted(active_runs(), key=lambda run: run.submitted):
+            elapsed = run.duration if run.status == RunState.RUNNING else 0.0
+            self.runs_tree.insert('', tk.END, text=run.title, values=(
+                run.status, f"{elapsed:.1f}s", run.output_lines, run.last_output[:120]))
+
+        self.metrics_tree.delete(*self.metrics_tree.get_children())
+        for name, value in METRICS.summary():
+            self.metrics_tree.insert('', tk.END, text=name, values=(value,))
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def copy_metrics(self):
+        """Copy all metrics in Prometheus text format"""
+        self.clipboard_clear()
+        self.clipboard_append(METRICS.render())
@@ -0,0 +1,50 @@
+"""Atomic file replacement shared by everything Yonky writes whole
+
+atomic_write(path) opens a temporary file next to path; when the with block
+completes, the data is flushed to disk and the temporary file replaces path
+in one rename, so a reader sees either the old or the new contents, never
+a partial file. If the block raises, path is left alone. Nothing in this
+module imports the rest of Yonky, so every module can use it.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Windows refuses the rename while another process has the file open
+REPLACE_ATTEMPTS = 5
+REPLACE_RETRY_SECONDS = 0.05
+
+
+def replace_file(source, destination):
+    """os.replace, retried while the destination is briefly locked"""
+    for attempt in range(REPLACE_ATTEMPTS):
+        try:
+            os.replace(source, destination)
+            return
+        except PermissionError:
+            if attempt == REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(REPLACE_RETRY_SECONDS)
+
+
+@contextmanager
+def atomic_write(path, newline=None):
+    """Yield a UTF-8 text file whose contents replace path on success
+
+    The temporary name includes the process and thread, so concurrent
+    writers of the same path never share one.
+    """
+    temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8", newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
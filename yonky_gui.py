@@ -0,0 +1,1026 @@
+"""Yonky Tk user interface"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox, scrolledtext
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from yonky_core import (
+    SCRIPTS_DIR,
+    CACHE_DIR,
+    OUTPUT_PUMP_INTERVAL_MS,
+    DEFAULT_OUTPUT_MAX_LINES,
+    DEFAULT_OUTPUT_MAX_BYTES,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_CATALOG_POLL_SECONDS,
+    DEFAULT_CONFIG_POLL_SECONDS,
+    OutputQueue,
+    OutputBuffer,
+    RunState,
+    ExecutionEngine,
+    render_output,
+    run_script,
+    shutdown_host_pool,
+)
+from yonky_cache import ResultCache
+from yonky_catalog import ScriptCatalog, CatalogWatcher, CatalogDiff, script_info
+from yonky_config import ConfigStore
+from yonky_history import RunHistory
+from yonky_metrics import UI_BACKLOG, UI_PUMP_DURATION, UI_PUMP_LAG, start_exporters, stop_exporters
+from yonky_pipeline import PipelineError, PipelineRun, load_pipelines
+from yonky_records import export_records
+
+MAX_RUN_TABS = 20
+# Structured records moved into a record table per pump
+RECORDS_MAX_PER_PUMP = 1000
+# The search box filters once typing pauses this long
+SEARCH_DEBOUNCE_MS = 100
+# Placeholder row shown until the catalog has loaded; ':' never occurs in a script path
+LOADING_ROW = ":loading"
+
+
+class StartupProfile:
+    """Wall-clock timings of named start-up phases
+
+    Phases may be timed on any thread; each is reported with its own
+    duration and the time since start at which it ended, so overlapping
+    background phases still read correctly. Nothing is recorded after
+    finish().
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def record(self, name, started):
+        """Record a phase that began at perf_counter() value started"""
+        now = time.perf_counter()
+        with self._lock:
+            if not self.finished:
+                self.phases.append((name, now - started, now - self.start))
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started)
+
+    def mark(self, name):
+        """Record a point in time, e.g. the first paint"""
+        self.record(name, time.perf_counter())
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+
+    def report(self):
+        """Table of phases with their duration and end time in milliseconds"""
+        lines = [f"{'Phase':<16}{'took ms':>10}{'at ms':>10}"]
+        for name, duration, end in self.phases:
+            lines.append(f"{name:<16}{duration * 1000:>10.1f}{end * 1000:>10.1f}")
+        return "\n".join(lines)
+
+
+class ScriptTreeRows:
+    """Script rows of a Treeview, grouped under folder rows and filterable
+
+    Script rows are keyed by their path relative to the scripts folder and
+    folder rows by their category plus '/', so the two never collide.
+    filter() attaches just the matching rows; the others are detached, not
+    deleted, so showing them again is cheap.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.scripts = set()
+        self.folders = set()
+        # Scripts shown by the current filter, None when unfiltered
+        self.visible = None
+        self._layout = {}
+
+    @staticmethod
+    def _parent(iid):
+        """Item id of the folder row that holds a script or folder row"""
+        category = iid.rstrip("/").rpartition("/")[0]
+        return category + "/" if category else ""
+
+    def _insert_sorted(self, parent, iid, **kw):
+        """Insert iid under parent keeping the children sorted by item id"""
+        siblings = self.tree.get_children(parent)
+        self.tree.insert(parent, bisect_left(siblings, iid), iid=iid, **kw)
+
+    def _folder(self, category):
+        """Return the item id of a category folder row, creating it if needed"""
+        if not category:
+            return ''
+        iid = category + "/"
+        if not self.tree.exists(iid):
+            parent, _, label = category.rpartition("/")
+            self._insert_sorted(self._folder(parent), iid, text=label, open=True)
+            self.folders.add(iid)
+        return iid
+
+    def update(self, diff, row):
+        """Apply a CatalogDiff, leaving every script shown
+
+        row(entry) returns the column values of an entry.
+        """
+        tree = self.tree
+        if self.visible is not None:
+            # Edit the full tree; the caller filters it again
+            self._attach(self.scripts)
+            self.visible = None
+
+        for entry in diff.removed:
+            if tree.exists(entry.name):
+                parent = tree.parent(entry.name)
+                tree.delete(entry.name)
+                self.scripts.discard(entry.name)
+                # Drop category folders that became empty
+                while parent and not tree.get_children(parent):
+                    grandparent = tree.parent(parent)
+                    tree.delete(parent)
+                    self.folders.discard(parent)
+                    parent = grandparent
+        for entry in diff.changed:
+            if tree.exists(entry.name):
+                tree.item(entry.name, values=row(entry))
+
+        for entry in sorted(diff.added, key=lambda entry: entry.name):
+            if tree.exists(entry.name):
+                tree.item(entry.name, values=row(entry))
+                continue
+            self._insert_sorted(self._folder(entry.category), entry.name,
+                                text=entry.basename, values=row(entry))
+            self.scripts.add(entry.name)
+        self._layout.clear()
+
+    def filter(self, matches):
+        """Show the scripts in matches, or all for None; return how many are shown"""
+        if matches is None:
+            if self.visible is not None:
+                self._attach(self.scripts)
+                self.visible = None
+            return len(self.scripts)
+        visible = self.scripts & matches
+        if visible != self.visible:
+            self._attach(visible)
+            self.visible = visible
+        return len(visible)
+
+    def _attach(self, names):
+        """Attach exactly the given scripts (and their folders), in sorted order
+
+        Only parents whose children changed are touched.
+        """
+        children = {'': []}
+        children.update((folder, []) for folder in self.folders)
+        for iid in names:
+            parent = self._parent(iid)
+            while True:
+                siblings = children[parent]
+                siblings.append(iid)
+                # A folder joins its own parent with its first visible child
+                if not parent or len(siblings) > 1:
+                    break
+                iid, parent = parent, self._parent(parent)
+
+        for parent, items in children.items():
+            items.sort()
+            if self._layout.get(parent) != items:
+                self.tree.set_children(parent, *items)
+                self._layout[parent] = items
+
+
+class RecordTable(ttk.Frame):
+    """Table of a run's structured records, newest view_limit rows"""
+
+    def __init__(self, parent, run, on_export):
+        super().__init__(parent)
+        self.run = run
+        self.rows = deque()
+        self.columns = []
+
+        self.tree = ttk.Treeview(self, show='headings')
+        y_scroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        x_scroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+
+        bottom = ttk.Frame(self)
+        bottom.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
+        self.count_label = ttk.Label(bottom)
+        self.count_label.pack(side=tk.LEFT)
+        ttk.Button(bottom, text="Export...", command=lambda: on_export([run])).pack(side=tk.RIGHT)
+
+        x_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        y_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    @staticmethod
+    def cell(value):
+        if value is None:
+            return ""
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, separators=(",", ":"), default=str)
+        return str(value)
+
+    def pump(self):
+        """Append the run's new records, dropping the oldest rows beyond the view limit"""
+        records = self.run.records
+        new = records.drain(RECORDS_MAX_PER_PUMP)
+        if not new:
+            return
+        columns = list(records.columns)
+        if columns != self.columns:
+            # New keys only ever add columns at the end, so existing rows stay aligned
+            self.columns = columns
+            self.tree["columns"] = columns
+            for column in columns:
+                self.tree.heading(column, text=column)
+                self.tree.column(column, width=120, stretch=False)
+        for record in new:
+            values = [self.cell(record.get(column)) for column in columns]
+            self.rows.append(self.tree.insert('', tk.END, values=values))
+        excess = len(self.rows) - records.view_limit
+        if excess > 0:
+            self.tree.delete(*[self.rows.popleft() for _ in range(excess)])
+
+        text = f"{records.count} records"
+        if records.count > len(self.rows):
+            text += f", showing the latest {len(self.rows)}"
+        self.count_label.config(text=text)
+
+
+class ScriptLauncherApp(tk.Tk):
+    def __init__(self, profile_startup=False, start_time=None):
+        # Start-up is timed per phase; --profile-startup prints the report
+        self.startup = StartupProfile(start_time)
+        self.profile_startup = profile_startup
+        self.startup.record("imports", self.startup.start)
+
+        with self.startup.phase("tk init"):
+            super().__init__()
+        self.title("Yonky – PowerShell Script Launcher")
+        self.geometry("1000x650")
+        self.minsize(600, 400)
+        
+        # Load configuration
+        with self.startup.phase("config"):
+            self.config_data = self.load_config()
+        
+        # Apply theme
+        self.style = ttk.Style()
+        self.style.theme_use('clam')
+        
+        # Output produced by any thread is queued and rendered by _pump_output
+        self.output_queue = OutputQueue()
+        self.output_buffer = OutputBuffer(
+            self.config_data.get("output_max_lines", DEFAULT_OUTPUT_MAX_LINES),
+            self.config_data.get("output_max_bytes", DEFAULT_OUTPUT_MAX_BYTES),
+        )
+        self.ui_calls = deque()
+        self._pump_due = None
+
+        # Runs are executed by a bounded worker pool, each with its own output tab
+        self.history = RunHistory()
+        self.engine = ExecutionEngine(
+            self.run_script,
+            self.config_data.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            on_change=lambda run: self.call_in_ui(self.on_run_changed, run),
+            history=self.history,
+        )
+        self.run_tabs = {}
+        self.record_tabs = {}
+        self.pipeline_runs = []
+
+        # Script list is diffed against a stat cache and polled in the background
+        self.catalog = ScriptCatalog(config_data=self.config_data)
+        self._filter_job = None
+        self.catalog_watcher = CatalogWatcher(
+            self.catalog,
+            lambda diff: self.call_in_ui(self.apply_catalog_diff, diff),
+            self.config_data.get("catalog_poll_seconds", DEFAULT_CATALOG_POLL_SECONDS),
+        )
+
+        with self.startup.phase("menu"):
+            self.setup_menu()
+        with self.startup.phase("widgets"):
+            self.setup_ui()
+        # The catalog is loaded once the window is on screen
+        self.after_idle(self.on_window_shown)
+        self.after(OUTPUT_PUMP_INTERVAL_MS, self._pump_output)
+        if self.config_store.load_error:
+            self.log_output(self.config_store.load_error, "error")
+        self.config_store.watch(self.config_data.get("config_poll_seconds", DEFAULT_CONFIG_POLL_SECONDS))
+        self.metrics_exporters = start_exporters(self.config_data, lambda message: self.log_output(message, "error"))
+        
+        # Bind close event
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+    def on_window_shown(self):
+        """Load the script catalog without blocking the first paint"""
+        self.startup.mark("window shown")
+        self.status_label.config(text="Loading scripts...")
+        self.script_tree.insert('', tk.END, iid=LOADING_ROW, text="Loading scripts...")
+
+        def load_index():
+            # Show the persisted index first, then revalidate it
+            try:
+                with self.startup.phase("index load"):
+                    diff = self.catalog.load_index()
+            except Exception as e:
+                self.log_output(f"Error loading script index: {e}", "error")
+                diff = CatalogDiff()
+            self.call_in_ui(self.on_index_loaded, diff)
+
+        threading.Thread(target=load_index, daemon=True).start()
+
+    def on_index_loaded(self, diff):
+        with self.startup.phase("index render"):
+            self.apply_catalog_diff(diff)
+        self.load_scripts(on_done=self.on_catalog_ready)
+
+    def on_catalog_ready(self):
+        """Initial scan finished: start polling and report start-up timings"""
+        if self.script_tree.exists(LOADING_ROW):
+            self.script_tree.delete(LOADING_ROW)
+            self.status_label.config(text=f"{len(self.catalog)} scripts loaded")
+        self.startup.mark("catalog ready")
+        self.startup.finish()
+        self.catalog_watcher.start()
+        if self.profile_startup:
+            print(self.startup.report(), file=sys.stderr)
+            self.on_closing()
+
+    def load_config(self):
+        """Load application configuration, kept in step with config.json by config_store"""
+        self.config_store = ConfigStore(
+            on_reload=lambda keys: self.call_in_ui(self.on_config_reloaded, keys),
+            on_error=lambda message: self.log_output(message, "error"),
+        )
+        return self.config_store.data
+
+    def save_config(self):
+        """Save application configuration shortly, coalescing further changes"""
+        self.config_store.schedule_save()
+
+    def on_config_reloaded(self, keys):
+        """Apply settings another instance (or an editor) changed in config.json"""
+        self.log_output(f"config.json changed on disk, reloaded: {', '.join(sorted(keys))}", "info")
+        if "max_concurrency" in keys:
+            self.engine.set_max_workers(self.config_data.get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+
+    def setup_ui(self):
+        """Setup the user interface"""
+        # Header
+        header_frame = ttk.Frame(self)
+        header_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(header_frame, text="Yonky - Built with Powershell, and a little cat magic", 
+                 font=("Segoe UI", 16, "bold")).pack(side=tk.LEFT)
+        
+        # Status label
+        self.status_label = ttk.Label(header_frame, text="Ready", 
+                                     font=("Segoe UI", 9))
+        self.status_label.pack(side=tk.RIGHT)
+
+        # Main container with paned window
+        main_paned = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        main_paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Scripts frame
+        scripts_container = ttk.LabelFrame(main_paned, text="Available Scripts", padding=5)
+        main_paned.add(scripts_container, weight=1)
+
+        # Search box filters the list as you type
+        search_frame = ttk.Frame(scripts_container)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.schedule_filter)
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.search_entry.bind('<Escape>', lambda e: self.search_var.set(""))
+        
+        # Create treeview for scripts, grouped by sub folder
+        columns = ('Title', 'Description', 'Parameters', 'Modified', 'Size')
+        self.script_tree = ttk.Treeview(scripts_container, columns=columns, show='tree headings', height=6)
+        
+        # Configure columns
+        self.script_tree.heading('#0', text='Script Name')
+        self.script_tree.heading('Title', text='Name')
+        self.script_tree.heading('Description', text='Description')
+        self.script_tree.heading('Parameters', text='Parameters')
+        self.script_tree.heading('Modified', text='Last Modified')
+        self.script_tree.heading('Size', text='Size (KB)')
+        
+        self.script_tree.column('#0', width=200)
+        self.script_tree.column('Title', width=140)
+        self.script_tree.column('Description', width=260)
+        self.script_tree.column('Parameters', width=120)
+        self.script_tree.column('Modified', width=120)
+        self.script_tree.column('Size', width=70)
+        
+        # Scrollbar for treeview
+        tree_scroll = ttk.Scrollbar(scripts_container, orient=tk.VERTICAL, command=self.script_tree.yview)
+        self.script_tree.configure(yscrollcommand=tree_scroll.set)
+        self.script_rows = ScriptTreeRows(self.script_tree)
+        
+        # Pack treeview and scrollbar
+        self.script_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Buttons frame
+        button_frame = ttk.Frame(scripts_container)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        ttk.Button(button_frame, text="Run Selected", 
+                  command=self.run_selected_script).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Force Re-run",
+                  command=lambda: self.run_selected_script(force=True)).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Edit Script", 
+                  command=self.edit_selected_script).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Delete Selected", 
+                  command=self.delete_selected_script).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="Refresh", 
+                  command=self.load_scripts).pack(side=tk.RIGHT)
+
+        # Output frame
+        output_container = ttk.LabelFrame(main_paned, text="Output", padding=5)
+        main_paned.add(output_container, weight=2)
+
+        # One tab for launcher messages plus one per run
+        self.output_tabs = ttk.Notebook(output_container)
+        self.output_tabs.pack(fill=tk.BOTH, expand=True)
+        self.output_box = self.create_output_box(self.output_tabs)
+        self.output_tabs.add(self.output_box, text="Launcher")
+
+        # Progress and status frame
+        status_frame = ttk.Frame(self)
+        status_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
+
+        self.progress = ttk.Progressbar(status_frame, mode='indeterminate')
+        self.progress.pack(fill=tk.X, pady=(0, 5))
+
+        self.cancel_button = ttk.Button(status_frame, text="Cancel Run",
+                                        command=self.cancel_selected_run, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT)
+
+        # Bottom status
+        self.bottom_status = ttk.Label(status_frame, text="Ready to run scripts")
+        self.bottom_status.pack(side=tk.LEFT)
+
+    def create_output_box(self, parent):
+        """Create a text widget styled for script output"""
+        output_box = scrolledtext.ScrolledText(
+            parent, 
+            height=15, 
+            wrap=tk.WORD, 
+            font=("Consolas", 10),
+            bg='#1e1e1e',
+            fg='#ffffff',
+            insertbackground='white'
+        )
+
+        # Configure text tags for colored output
+        output_box.tag_configure("error", foreground="#ff6b6b")
+        output_box.tag_configure("success", foreground="#51cf66")
+        output_box.tag_configure("info", foreground="#74c0fc")
+        output_box.tag_configure("timestamp", foreground="#868e96")
+        return output_box
+
+    def setup_menu(self):
+        """Setup application menu"""
+        menu = tk.Menu(self)
+
+        # File Menu
+        file_menu = tk.Menu(menu, tearoff=0)
+        file_menu.add_command(label="Add Script...", command=self.add_script, accelerator="Ctrl+O")
+        file_menu.add_command(label="New Script...", command=self.create_new_script, accelerator="Ctrl+N")
+        file_menu.add_separator()
+        file_menu.add_command(label="Refresh Scripts", command=self.load_scripts, accelerator="F5")
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.on_closing, accelerator="Ctrl+Q")
+        menu.add_cascade(label="File", menu=file_menu)
+
+        # Edit Menu
+        edit_menu = tk.Menu(menu, tearoff=0)
+        edit_menu.add_command(label="Clear Output", command=self.clear_output, accelerator="Ctrl+L")
+        edit_menu.add_command(label="Copy Output", command=self.copy_output, accelerator="Ctrl+C")
+        edit_menu.add_command(label="Close Output Tab", command=self.close_output_tab, accelerator="Ctrl+W")
+        edit_menu.add_command(label="Export Records...", command=self.export_selected_records)
+        edit_menu.add_command(label="Cancel Run", command=self.cancel_selected_run)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Preferences...", command=self.show_preferences)
+        menu.add_cascade(label="Edit", menu=edit_menu)
+
+        # Tools Menu
+        tools_menu = tk.Menu(menu, tearoff=0)
+        tools_menu.add_command(label="Open Scripts Folder", command=self.open_scripts_folder)
+        tools_menu.add_command(label="PowerShell Console", command=self.open_powershell)
+        tools_menu.add_separator()
+        self.pipelines_menu = tk.Menu(tools_menu, tearoff=0, postcommand=self.update_pipelines_menu)
+        tools_menu.add_cascade(label="Run Pipeline", menu=self.pipelines_menu)
+        tools_menu.add_command(label="Run on Targets...", command=self.show_fanout)
+        tools_menu.add_command(label="Run Statistics...", command=self.show_stats)
+        tools_menu.add_command(label="Clear Result Cache", command=self.clear_result_cache)
+        tools_menu.add_command(label="Diagnostics...", command=self.show_diagnostics)
+        menu.add_cascade(label="Tools", menu=tools_menu)
+
+        # Help Menu
+        help_menu = tk.Menu(menu, tearoff=0)
+        help_menu.add_command(label="About", command=self.show_about)
+        menu.add_cascade(label="Help", menu=help_menu)
+
+        self.config(menu=menu)
+
+        # Bind keyboard shortcuts
+        self.bind('<Control-o>', lambda e: self.add_script())
+        self.bind('<Control-n>', lambda e: self.create_new_script())
+        self.bind('<F5>', lambda e: self.load_scripts())
+        self.bind('<Control-f>', lambda e: self.search_entry.focus_set())
+        self.bind('<Control-l>', lambda e: self.clear_output())
+        self.bind('<Control-w>', lambda e: self.close_output_tab())
+        self.bind('<Control-q>', lambda e: self.on_closing())
+
+    def log_output(self, message, tag=""):
+        """Add message to output with optional formatting (thread-safe)"""
+        self.output_queue.put(message, tag, self.config_data.get("show_timestamps", True))
+
+    def call_in_ui(self, func, *args):
+        """Schedule func(*args) on the Tk main loop; safe to call from any thread"""
+        self.ui_calls.append((func, args))
+
+    def _pump_output(self):
+        """Drain queued UI calls and output into the widget, then reschedule"""
+        started = time.perf_counter()
+        if self._pump_due is not None:
+            UI_PUMP_LAG.observe(max(0.0, started - self._pump_due))
+        try:
+            while self.ui_calls:
+                func, args = self.ui_calls.popleft()
+                func(*args)
+
+            auto_scroll = self.config_data.get("auto_scroll", True)
+            render_output(self.output_queue, self.output_buffer, self.output_box, auto_scroll)
+            for run_id, (run, output_box) in self.run_tabs.items():
+                render_output(run.output, run.buffer, output_box, auto_scroll)
+                if run.records.count and run_id not in self.record_tabs:
+                    self.add_record_tab(run, output_box)
+            for table in self.record_tabs.values():
+                table.pump()
+        finally:
+            UI_BACKLOG.set(len(self.output_queue) + sum(len(run.output) for run, _ in self.run_tabs.values()))
+            finished = time.perf_counter()
+            UI_PUMP_DURATION.observe(finished - started)
+            self._pump_due = finished + OUTPUT_PUMP_INTERVAL_MS / 1000
+            self.after(OUTPUT_PUMP_INTERVAL_MS, self._pump_output)
+
+    def current_output(self):
+        """Return (buffer, text widget) of the selected output tab"""
+        selected = self.output_tabs.select()
+        for run, output_box in self.run_tabs.values():
+            if str(output_box) == selected:
+                return run.buffer, output_box
+        return self.output_buffer, self.output_box
+
+    def add_script(self):
+        """Add a new script from file system"""
+        from tkinter import filedialog
+        file_path = filedialog.askopenfilename(
+            title="Select PowerShell Script",
+            filetypes=[
+                ("PowerShell Scripts", "*.ps1"),
+                ("Batch Files", "*.bat *.cmd"),
+                ("All Files", "*.*")
+            ]
+        )
+        if file_path:
+            dest_path = os.path.join(SCRIPTS_DIR, os.path.basename(file_path))
+            try:
+                with open(file_path, 'rb') as src, open(dest_path, 'wb') as dst:
+                    dst.write(src.read())
+                self.log_output(f"Added script: {os.path.basename(file_path)}", "success")
+                self.load_scripts()
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not add script: {e}")
+
+    def create_new_script(self):
+        """Create a new empty script"""
+        from tkinter import simpledialog
+        script_name = simpledialog.askstring("New Script", "Enter script name (without .ps1):")
+        if script_name:
+            if not script_name.endswith('.ps1'):
+                script_name += '.ps1'
+            
+            script_path = os.path.join(SCRIPTS_DIR, script_name)
+            try:
+                with open(script_path, 'w') as f:
+                    f.write("# New PowerShell Script\n# Created: {}\n\nWrite-Host 'Hello from {}'\n".format(
+                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                        script_name
+                    ))
+                self.log_output(f"Created new script: {script_name}", "success")
+                self.load_scripts()
+                self.edit_script(script_name)
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not create script: {e}")
+
+    def edit_script(self, script_name):
+        """Open script in default editor"""
+        script_path = os.path.join(SCRIPTS_DIR, script_name)
+        try:
+            os.startfile(script_path)
+        except Exception as e:
+            self.log_output(f"Could not open editor: {e}", "error")
+
+    def edit_selected_script(self):
+        """Edit the currently selected script"""
+        script_name = self.selected_script()
+        if script_name:
+            self.edit_script(script_name)
+
+    def clear_output(self):
+        """Clear the selected output tab"""
+        output_buffer, output_box = self.current_output()
+        output_box.delete(1.0, tk.END)
+        output_buffer.clear()
+        self.log_output("Output cleared", "info")
+
+    def copy_output(self):
+        """Copy output of the selected tab to clipboard"""
+        try:
+            output_text = self.current_output()[0].text()
+            self.clipboard_clear()
+            self.clipboard_append(output_text)
+            self.log_output("Output copied to clipboard", "info")
+        except Exception as e:
+            self.log_output(f"Could not copy output: {e}", "error")
+
+    def load_scripts(self, on_done=None):
+        """Rescan the scripts folder in the background and apply the changes
+
+        on_done() is called on the UI thread once the rows and their
+        metadata are up to date, or the scan failed.
+        """
+        def refresh():
+            try:
+                with self.startup.phase("catalog scan"):
+                    diff = self.catalog.refresh()
+                self.call_in_ui(self.apply_catalog_diff, diff)
+                # Header metadata is parsed after the rows are shown
+                with self.startup.phase("metadata"):
+                    updated = self.catalog.update_metadata()
+                self.catalog.save_index()
+            except Exception as e:
+                self.log_output(f"Error loading scripts: {e}", "error")
+                updated = []
+            if updated:
+                self.call_in_ui(self.apply_catalog_diff, CatalogDiff(changed=updated))
+            if on_done is not None:
+                self.call_in_ui(on_done)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def script_row(self, entry):
+        """Treeview values for a catalog entry"""
+        info = script_info(entry, self.config_data)
+        modified = datetime.fromtimestamp(entry.mtime).strftime("%Y-%m-%d %H:%M")
+        size = f"{entry.size / 1024:.1f}"
+        return (info["name"], info["description"], ", ".join(info["parameters"]), modified, size)
+
+    def apply_catalog_diff(self, diff):
+        """Update only the Treeview rows that a catalog refresh changed"""
+        if diff.added and self.script_tree.exists(LOADING_ROW):
+            self.script_tree.delete(LOADING_ROW)
+        filtered = self.script_rows.visible is not None
+        self.script_rows.update(diff, self.script_row)
+        if filtered:
+            self.filter_scripts()
+        else:
+            self.status_label.config(text=f"{len(self.catalog)} scripts loaded")
+
+    def schedule_filter(self, *args):
+        """Filter the list once typing pauses for SEARCH_DEBOUNCE_MS"""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(SEARCH_DEBOUNCE_MS, self.filter_scripts)
+
+    def filter_scripts(self):
+        """Show only scripts matching the search box"""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        matches = self.catalog.search_index.search(self.search_var.get())
+        shown = self.script_rows.filter(matches)
+        if matches is None:
+            self.status_label.config(text=f"{len(self.catalog)} scripts loaded")
+        else:
+            self.status_label.config(text=f"{shown} of {len(self.catalog)} scripts")
+
+    def selected_script(self):
+        """Return the selected script's name, or None for no selection or a folder"""
+        selection = self.script_tree.selection()
+        if selection and not selection[0].endswith("/"):
+            return selection[0]
+        return None
+
+    def run_selected_script(self, force=False):
+        """Run the currently selected script; force bypasses the result cache"""
+        script_name = self.selected_script()
+        if not script_name:
+            messagebox.showwarning("No Selection", "Please select a script to run")
+            return
+        
+        self.run_script_thread(script_name, force)
+
+    def delete_selected_script(self):
+        """Delete the currently selected script"""
+        script_name = self.selected_script()
+        if not script_name:
+            messagebox.showwarning("No Selection", "Please select a script to delete")
+            return
+        
+        self.delete_script(script_name)
+
+    def run_script_thread(self, script_name, force=False):
+        """Queue script on the execution engine"""
+        return self.engine.submit(script_name, self.config_data, force=force)
+
+    def run_script(self, run):
+        """Execute a script (called on an engine worker thread)"""
+        run_script(run, self.config_data)
+
+    def delete_script(self, script_name):
+        """Delete a script file"""
+        confirm = messagebox.askyesno("Confirm Delete", 
+                                     f"Are you sure you want to delete '{script_name}'?")
+        if confirm:
+            try:
+                os.remove(os.path.join(SCRIPTS_DIR, script_name))
+                self.load_scripts()
+                self.log_output(f"Deleted script: {script_name}", "success")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not delete script: {e}")
+
+    def on_run_changed(self, run):
+        """Create or relabel the run's output tab and refresh the status bar"""
+        if run.run_id not in self.run_tabs:
+            output_box = self.create_output_box(self.output_tabs)
+            self.output_tabs.add(output_box, text=run.title)
+            self.output_tabs.select(output_box)
+            self.run_tabs[run.run_id] = (run, output_box)
+            self.prune_run_tabs()
+        else:
+            output_box = self.run_tabs[run.run_id][1]
+        status = f"{run.status}, cached" if run.cached else run.status
+        self.output_tabs.tab(output_box, text=f"{run.title} ({status})")
+        if run.finished:
+            self.log_output(f"{run.title} {status} in {run.duration:.2f} seconds",
+                            "success" if run.status == RunState.SUCCEEDED else "error")
+        self.set_ui_state()
+
+    def add_record_tab(self, run, output_box):
+        """Show a run's records in a table tab next to its output"""
+        table = RecordTable(self.output_tabs, run, self.export_records)
+        self.output_tabs.insert(self.output_tabs.index(output_box) + 1, table, text=f"{run.title} records")
+        self.record_tabs[run.run_id] = table
+
+    def export_selected_records(self):
+        """Export the selected run's records, or those of every run from the Launcher tab"""
+        selected = self.output_tabs.select()
+        for run_id, (run, output_box) in self.run_tabs.items():
+            table = self.record_tabs.get(run_id)
+            if selected in (str(output_box), str(table)):
+                self.export_records([run])
+                return
+        self.export_records([run for run, _ in self.run_tabs.values()])
+
+    def export_records(self, runs):
+        """Ask for a file and write the runs' records to it as CSV or JSON"""
+        runs = [run for run in runs if run.records.count]
+        if not runs:
+            messagebox.showinfo("Export Records", "No structured records to export")
+            return
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(
+            title="Export Records",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON files", "*.json")],
+        )
+        if not path:
+            return
+        for run in runs:
+            if not run.records.complete:
+                self.log_output(f"{run.title}: records file unavailable, exporting the latest "
+                                f"{run.records.view_limit} records only", "error")
+
+        def export():
+            # Streams from the records files, which may be large
+            try:
+                count = export_records([(run.title, run.records) for run in runs], path)
+            except (OSError, ValueError) as e:
+                self.log_output(f"Could not export records: {e}", "error")
+                return
+            self.log_output(f"Exported {count} records from {len(runs)} runs to {path}", "success")
+
+        threading.Thread(target=export, daemon=True).start()
+
+    def forget_run_tab(self, run_id):
+        """Close a run's output tab and its record tab"""
+        output_box = self.run_tabs.pop(run_id)[1]
+        self.output_tabs.forget(output_box)
+        output_box.destroy()
+        table = self.record_tabs.pop(run_id, None)
+        if table is not None:
+            self.output_tabs.forget(table)
+            table.destroy()
+
+    def update_pipelines_menu(self):
+        """List the pipelines from config.json each time the menu opens"""
+        self.pipelines_menu.delete(0, tk.END)
+        try:
+            pipelines = load_pipelines(self.config_data)
+        except PipelineError as e:
+            self.pipelines_menu.add_command(label=str(e), state=tk.DISABLED)
+            return
+        if not pipelines:
+            self.pipelines_menu.add_command(label="(none in config.json)", state=tk.DISABLED)
+        for name in sorted(pipelines):
+            self.pipelines_menu.add_command(label=name, command=lambda name=name: self.run_pipeline(name))
+
+    def run_pipeline(self, name):
+        """Start a pipeline; its steps show up as ordinary run tabs"""
+        try:
+            pipeline = load_pipelines(self.config_data)[name]
+        except (PipelineError, KeyError) as e:
+            messagebox.showerror("Pipeline", f"Could not load pipeline '{name}': {e}")
+            return
+        missing = pipeline.missing_scripts()
+        if missing:
+            messagebox.showerror("Pipeline", "Scripts not found:\n" + "\n".join(missing))
+            return
+        pipeline_run = PipelineRun(
+            pipeline, self.engine, self.config_data,
+            on_change=lambda pipeline_run, step: self.call_in_ui(self.on_pipeline_changed, pipeline_run, step),
+        )
+        self.pipeline_runs.append(pipeline_run)
+        self.log_output(f"Pipeline '{name}' started ({len(pipeline.steps)} steps)", "info")
+        pipeline_run.start()
+
+    def on_pipeline_changed(self, pipeline_run, step):
+        """Log pipeline progress to the Launcher tab"""
+        name = pipeline_run.pipeline.name
+        if step is not None:
+            self.log_output(f"Pipeline '{name}': {step.name} {pipeline_run.step_status(step.name)}", "info")
+            return
+        if pipeline_run in self.pipeline_runs:
+            self.pipeline_runs.remove(pipeline_run)
+        self.log_output(f"Pipeline '{name}' {pipeline_run.status} in {pipeline_run.duration:.2f} seconds",
+                        "success" if pipeline_run.status == RunState.SUCCEEDED else "error")
+        for line in pipeline_run.summary():
+            self.log_output(f"  {line}")
+
+    def prune_run_tabs(self):
+        """Close the oldest finished tabs beyond MAX_RUN_TABS"""
+        finished = [run_id for run_id, (run, _) in self.run_tabs.items() if run.finished]
+        for run_id in finished[:max(0, len(self.run_tabs) - MAX_RUN_TABS)]:
+            self.forget_run_tab(run_id)
+
+    def close_output_tab(self):
+        """Close the selected run tab once its run has finished
+
+        A record tab can be closed on its own; it is not shown again.
+        """
+        selected = self.output_tabs.select()
+        for table in self.record_tabs.values():
+            if str(table) == selected:
+                self.output_tabs.hide(table)
+                return
+        for run_id, (run, output_box) in list(self.run_tabs.items()):
+            if str(output_box) == selected:
+                if not run.finished:
+                    messagebox.showwarning("Run Active", f"{run.title} is still {run.status}")
+                    return
+                self.forget_run_tab(run_id)
+                return
+
+    def cancel_selected_run(self):
+        """Cancel the selected tab's run, or every active run from the Launcher tab"""
+        selected = self.output_tabs.select()
+        for run, output_box in self.run_tabs.values():
+            if str(output_box) == selected:
+                if not run.finished:
+                    self.log_output(f"Cancelling {run.title}...", "info")
+                    self.engine.cancel(run)
+                return
+
+        active = self.engine.running + self.engine.queued
+        if active and messagebox.askyesno("Cancel Runs", f"Cancel all {len(active)} active runs?"):
+            self.log_output(f"Cancelling {len(active)} runs...", "info")
+            for pipeline_run in self.pipeline_runs:
+                pipeline_run.cancel()
+            self.engine.cancel_all()
+
+    def set_ui_state(self):
+        """Update progress bar and status from the engine's active runs"""
+        running = self.engine.running
+        queued = self.engine.queued
+        if running or queued:
+            self.progress.start()
+            names = ", ".join(run.script_name for run in running)
+            text = f"Running {len(running)}: {names}"
+            if queued:
+                text += f" ({len(queued)} queued)"
+            self.bottom_status.config(text=text)
+            self.cancel_button.config(state=tk.NORMAL)
+        else:
+            self.progress.stop()
+            self.bottom_status.config(text="Ready")
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def open_scripts_folder(self):
+        """Open the scripts directory in file explorer"""
+        try:
+            os.startfile(SCRIPTS_DIR)
+        except Exception as e:
+            self.log_output(f"Could not open scripts folder: {e}", "error")
+
+    def clear_result_cache(self):
+        """Delete every cached script result"""
+        count = ResultCache(CACHE_DIR).clear()
+        self.log_output(f"Cleared {count} cached results", "info")
+
+    def open_powershell(self):
+        """Open PowerShell console"""
+        try:
+            subprocess.Popen(["powershell"], creationflags=subprocess.CREATE_NEW_CONSOLE)
+        except Exception as e:
+            self.log_output(f"Could not open PowerShell: {e}", "error")
+
+    def show_preferences(self):
+        """Show preferences dialog"""
+        from yonky_dialogs import PreferencesDialog
+        PreferencesDialog(self)
+
+    def show_fanout(self):
+        """Run the selected script on many target hosts"""
+        script_name = self.selected_script()
+        if not script_name:
+            messagebox.showwarning("No Selection", "Please select a script to run")
+            return
+        from yonky_dialogs import FanOutDialog
+        FanOutDialog(self, script_name)
+
+    def show_stats(self):
+        """Show run history statistics"""
+        from yonky_dialogs import StatsDialog
+        StatsDialog(self)
+
+    def show_diagnostics(self):
+        """Show live metrics and active runs"""
+        from yonky_dialogs import DiagnosticsDialog
+        DiagnosticsDialog(self)
+
+    def show_about(self):
+        """Show about dialog"""
+        messagebox.showinfo("About", 
+                           "Yonky - PowerShell Script Launcher\n"
+                           "Version 0.9.2\n"
+                           "Enhanced script management and execution\n"
+                           "Created By Finn Henderson\n"
+                           "Current Version. 07/2025")
+
+    def on_closing(self):
+        """Handle application closing"""
+        self.catalog_watcher.stop()
+        self.catalog.save_index()
+        self.engine.shutdown()
+        shutdown_host_pool()
+        stop_exporters(self.metrics_exporters)
+        self.config_store.close()
+        self.destroy()
+
+def main(profile_startup=False, start_time=None):
+    """Start the launcher window
+
+    With profile_startup the window closes again once the catalog has
+    loaded, after printing how long each start-up phase took.
+    """
+    # Ensure required directories exist
+    if not os.path.exists(SCRIPTS_DIR):
+        os.makedirs(SCRIPTS_DIR)
+    
+    app = ScriptLauncherApp(profile_startup, start_time)
+    app.mainloop()
@@ -0,0 +1,141 @@
+"""Yonky run history: an append-only JSONL log of finished runs
+
+Every finished run appends one JSON line to HISTORY_FILE. When the file
+grows past HISTORY_COMPACT_BYTES it is rewritten keeping only the newest
+HISTORY_KEEP_PER_SCRIPT records of each script. script_stats() summarizes
+the history per script (run count, failure rate, p50/p95 duration, last
+run) for the GUI statistics window and the 'stats' command.
+"""
+import json
+import math
+import os
+import threading
+from datetime import datetime
+
+from yonky_core import BASE_DIR, RunState
+from yonky_files import atomic_write
+
+HISTORY_FILE = os.path.join(BASE_DIR, "history.jsonl")
+HISTORY_KEEP_PER_SCRIPT = 500
+HISTORY_COMPACT_BYTES = 8 * 1024 * 1024
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+class RunHistory:
+    """Append-only store of run records with size-triggered compaction"""
+
+    def __init__(self, path=HISTORY_FILE, keep_per_script=HISTORY_KEEP_PER_SCRIPT,
+                 compact_bytes=HISTORY_COMPACT_BYTES):
+        self.path = path
+        self.keep_per_script = keep_per_script
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def run_record(run):
+        """History record for a finished RunState"""
+        return {
+            "script": run.script_name,
+            "target": run.target,
+            "status": run.status,
+            "exit_code": run.returncode,
+            "timed_out": run.status == RunState.TIMED_OUT,
+            "start": run.start_time,
+            "end": run.end_time,
+            "duration": round(run.duration, 3),
+            "output_lines": run.script_lines,
+            "output_bytes": run.script_bytes,
+        }
+
+    def record(self, run):
+        """Append a finished run; compacts the file when it gets too big
+
+        Cached replays did not execute the script and are not recorded.
+        """
+        if run.cached:
+            return
+        line = json.dumps(self.run_record(run), separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                    size = f.tell()
+            except OSError:
+                return
+            if size > self.compact_bytes:
+                self._compact()
+
+    def records(self):
+        """Yield every stored record, oldest first, skipping damaged lines"""
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except OSError:
+            return
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _compact(self):
+        """Keep only the newest keep_per_script records of each script"""
+        per_script = {}
+        for record in self.records():
+            per_script.setdefault(record.get("script"), []).append(record)
+        kept = []
+        for records in per_script.values():
+            kept.extend(records[-self.keep_per_script:])
+        kept.sort(key=lambda record: record.get("end") or 0)
+
+        try:
+            with atomic_write(self.path) as f:
+                for record in kept:
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError:
+            pass
+
+    def script_stats(self, scripts=None):
+        """Per-script summary, sorted by script name
+
+        Each item has script, runs, failures, failure_rate, p50, p95,
+        last_run (timestamp), last_status and last_duration.
+        """
+        per_script = {}
+        for record in self.records():
+            script = record.get("script")
+            if scripts and script not in scripts:
+                continue
+            per_script.setdefault(script, []).append(record)
+
+        stats = []
+        for script, records in sorted(per_script.items()):
+            durations = sorted(record.get("duration") or 0.0 for record in records)
+            failures = sum(1 for record in records if record.get("status") != RunState.SUCCEEDED)
+            last = max(records, key=lambda record: record.get("end") or 0)
+            stats.append({
+                "script": script,
+                "runs": len(records),
+                "failures": failures,
+                "failure_rate": failures / len(records),
+                "p50": percentile(durations, 0.50),
+                "p95": percentile(durations, 0.95),
+                "last_run": last.get("end"),
+                "last_status": last.get("status"),
+                "last_duration": last.get("duration"),
+            })
+        return stats
+
+
+def format_time(timestamp):
+    """Local time of a history timestamp for display"""
+    if not timestamp:
+        return ""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
@@ -0,0 +1,360 @@
+"""Warm interpreter hosts: run scripts without paying interpreter start-up
+
+A host is a long-lived interpreter process that reads one JSON request per
+line on stdin ({"script": path, "args": [...]}) and runs it in-process. Every
+line it prints is framed as "<token> <kind> <text>", where token is a random
+per-host string and kind is:
+
+    R   host is ready for the next request (sent once at start-up)
+    O   a line of the script's standard output
+    E   a line of the script's error output
+    X   the script finished; text is its exit code
+
+Lines without the token (e.g. written straight to the console) count as
+standard output. Scripts' errors arrive as E frames, so all of a run's
+output comes from one pipe and one thread, in order. The host's own stderr
+is only kept to explain a host that failed to start or died.
+
+HostPool keeps a few hosts alive, hands them out one run at a time, recycles
+a host after max_runs and closes hosts that stay idle for idle_seconds.
+
+The command is pluggable: powershell_host_command() runs the PowerShell
+bootstrap below, and python_host_command() runs this module as a Python
+stand-in host (scripts are executed with runpy), which is handy on machines
+without PowerShell.
+"""
+import base64
+import io
+import json
+import os
+import runpy
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+
+from yonky_process import process_group_kwargs
+
+TOKEN_ENV = "YONKY_HOST_TOKEN"
+HOST_START_TIMEOUT = 30
+DEFAULT_HOST_POOL_SIZE = 2
+DEFAULT_HOST_MAX_RUNS = 50
+DEFAULT_HOST_IDLE_SECONDS = 300
+# Lines of a host's own stderr kept for the error of a failed host
+HOST_STDERR_LINES = 20
+
+POWERSHELL_HOST = r"""
+$token = $env:YONKY_HOST_TOKEN
+[Console]::InputEncoding = [Text.Encoding]::UTF8
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+$out = [Console]::Out
+function Send($kind, $text) { $out.WriteLine("$token $kind $text"); $out.Flush() }
+Send 'R' ''
+while ($null -ne ($line = [Console]::In.ReadLine())) {
+    $request = $line | ConvertFrom-Json
+    $argv = @()
+    if ($request.args) { $argv = @($request.args) }
+    $global:LASTEXITCODE = 0
+    $failed = $false
+    try {
+        & $request.script @argv *>&1 | ForEach-Object {
+            if ($_ -is [System.Management.Automation.ErrorRecord]) {
+                foreach ($text in ("$_" -split "`r?`n")) { Send 'E' $text }
+            } else {
+                $_ | Out-String -Stream | ForEach-Object { Send 'O' $_ }
+            }
+        }
+    } catch {
+        foreach ($text in ("$_" -split "`r?`n")) { Send 'E' $text }
+        $failed = $true
+    }
+    if ($failed) { $code = 1 } elseif ($LASTEXITCODE) { $code = $LASTEXITCODE } else { $code = 0 }
+    Send 'X' $code
+}
+"""
+
+
+def powershell_host_command(execution_policy="Bypass", executable="powershell"):
+    """Command line for a warm PowerShell host"""
+    encoded = base64.b64encode(POWERSHELL_HOST.encode("utf-16-le")).decode("ascii")
+    return [executable, "-NoLogo", "-NoProfile", "-NonInteractive",
+            "-ExecutionPolicy", execution_policy, "-EncodedCommand", encoded]
+
+
+def python_host_command():
+    """Command line for the Python stand-in host implemented by this module"""
+    return [sys.executable, "-u", os.path.abspath(__file__), "--host"]
+
+
+class HostError(Exception):
+    """A warm host failed to start or died while running a script"""
+
+
+class WarmHost:
+    """One long-lived interpreter process speaking the framing protocol"""
+
+    def __init__(self, command):
+        self.token = uuid.uuid4().hex
+        self.runs = 0
+        self.last_used = time.time()
+        self._stderr = deque(maxlen=HOST_STDERR_LINES)
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={**os.environ, TOKEN_ENV: self.token},
+            encoding="utf-8",
+            errors="replace",
+            **process_group_kwargs()
+        )
+        self._stderr_reader = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_reader.start()
+
+        # Wait for the ready frame so start-up cost is paid here, not by a run
+        ready = threading.Event()
+        timer = threading.Timer(HOST_START_TIMEOUT, lambda: ready.is_set() or self.close())
+        timer.start()
+        try:
+            for kind, _ in self._frames():
+                if kind == "R":
+                    ready.set()
+                    break
+        finally:
+            timer.cancel()
+        if not ready.is_set():
+            self.close()
+            raise self._failure(f"host did not start: {' '.join(command[:1])}")
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _read_stderr(self):
+        for line in iter(self.process.stderr.readline, ""):
+            self._stderr.append(line.rstrip("\r\n"))
+
+    def _failure(self, message):
+        """HostError for message, with the end of the host's stderr"""
+        self._stderr_reader.join(1)
+        if self._stderr:
+            message += ": " + " / ".join(self._stderr)
+        return HostError(message)
+
+    def _frames(self):
+        """Yield (kind, text) for each line the host prints"""
+        prefix = self.token + " "
+        for line in iter(self.process.stdout.readline, ""):
+            line = line.rstrip("\r\n")
+            if line.startswith(prefix):
+                kind, _, text = line[len(prefix):].partition(" ")
+                yield kind, text
+            else:
+                yield "O", line
+
+    def run(self, script_path, args, emit):
+        """Run a script and return its exit code
+
+        emit(text, tag) receives each output line with tag "" for standard
+        output and "error" for error output. Raises HostError if the host
+        exits before the script finishes.
+        """
+        self.runs += 1
+        try:
+            request = json.dumps({"script": script_path, "args": list(args)})
+            try:
+                self.process.stdin.write(request + "\n")
+                self.process.stdin.flush()
+            except OSError as e:
+                raise self._failure(f"host is gone: {e}")
+            for kind, text in self._frames():
+                if kind == "X":
+                    try:
+                        return int(text)
+                    except ValueError:
+                        return 1
+                emit(text, "error" if kind == "E" else "")
+            raise self._failure(f"host exited with code {self.process.wait()}")
+        finally:
+            self.last_used = time.time()
+
+    def close(self):
+        """Stop the host; safe to call more than once"""
+        if self.alive:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class HostPool:
+    """A bounded set of warm hosts shared by the engine's worker threads
+
+    acquire() returns an idle host, starts a new one while fewer than size
+    exist, or waits for one to be released. release() returns it to the pool
+    unless it died or has served max_runs runs.
+    """
+
+    # How often a waiting acquire() polls its stop condition
+    STOP_POLL_SECONDS = 0.1
+
+    def __init__(self, command, size=DEFAULT_HOST_POOL_SIZE, max_runs=DEFAULT_HOST_MAX_RUNS,
+                 idle_seconds=DEFAULT_HOST_IDLE_SECONDS):
+        self.command = command
+        self.size = max(1, int(size))
+        self.max_runs = max(1, int(max_runs))
+        self.idle_seconds = idle_seconds
+        self._idle = []
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    def acquire(self, stop=None):
+        """Return a host, or None once stop() is true while waiting for one"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise HostError("host pool is closed")
+                while self._idle:
+                    host = self._idle.pop()
+                    if host.alive:
+                        return host
+                    self._count -= 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                if stop is not None and stop():
+                    return None
+                self._cond.wait(None if stop is None else self.STOP_POLL_SECONDS)
+        try:
+            host = WarmHost(self.command)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        self._start_reaper()
+        return host
+
+    def release(self, host):
+        with self._cond:
+            keep = not self._closed and host.alive and host.runs < self.max_runs
+            if keep:
+                self._idle.append(host)
+            else:
+                self._count -= 1
+            self._cond.notify()
+        if not keep:
+            host.close()
+
+    def prewarm(self, count=1):
+        """Start hosts in the background so the first runs find them ready"""
+        def start():
+            hosts = []
+            for _ in range(count):
+                try:
+                    hosts.append(self.acquire())
+                except Exception:
+                    break
+            for host in hosts:
+                self.release(host)
+
+        threading.Thread(target=start, daemon=True).start()
+
+    def _start_reaper(self):
+        with self._cond:
+            if self._reaper is not None or not self.idle_seconds:
+                return
+            self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        """Close hosts that have been idle for longer than idle_seconds"""
+        while not self._closed:
+            time.sleep(min(self.idle_seconds, 5))
+            now = time.time()
+            with self._cond:
+                expired = [host for host in self._idle if now - host.last_used > self.idle_seconds]
+                for host in expired:
+                    self._idle.remove(host)
+                self._count -= len(expired)
+            for host in expired:
+                host.close()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for host in idle:
+            host.close()
+
+
+class _FrameWriter(io.TextIOBase):
+    """File object that frames each complete line for the Python host"""
+
+    def __init__(self, out, token, kind):
+        self._out = out
+        self._prefix = f"{token} {kind} "
+        self._pending = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._out.write(self._prefix + line.rstrip("\r") + "\n")
+        return len(text)
+
+    def flush(self):
+        if self._pending:
+            self._out.write(self._prefix + self._pending + "\n")
+            self._pending = ""
+        self._out.flush()
+
+
+def python_host_main():
+    """Python stand-in host: run each requested script with runpy"""
+    token = os.environ.get(TOKEN_ENV, "")
+    out = sys.stdout
+    out.write(f"{token} R \n")
+    out.flush()
+    for line in sys.stdin:
+        request = json.loads(line)
+        stdout = _FrameWriter(out, token, "O")
+        stderr = _FrameWriter(out, token, "E")
+        sys.stdout, sys.stderr = stdout, stderr
+        sys.argv = [request["script"], *request.get("args", [])]
+        code = 0
+        try:
+            runpy.run_path(request["script"], run_name="__main__")
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                code = e.code
+            elif e.code is not None:
+                stderr.write(f"{e.code}\n")
+                code = 1
+        except BaseException:
+            traceback.print_exc(file=stderr)
+            code = 1
+        finally:
+            stdout.flush()
+            stderr.flush()
+            sys.stdout, sys.stderr = out, sys.__stderr__
+        out.write(f"{token} X {code}\n")
+        out.flush()
+
+
+if __name__ == "__main__" and sys.argv[1:] == ["--host"]:
+    python_host_main()
@@ -0,0 +1,358 @@
+"""Runtime metrics: counters, gauges and histograms for launcher health
+
+METRICS is the process-wide registry. The execution engine, the script
+catalog and the GUI output pump update the metrics defined below, and
+render() turns them into the Prometheus text format. Two optional
+exporters make them visible outside the process, both configured in
+config.json and off by default:
+
+    "metrics_port": 9464      serve http://127.0.0.1:9464/metrics
+    "metrics_file": "C:/metrics/yonky.prom"
+                              rewrite the file every "metrics_interval"
+                              seconds, e.g. for node_exporter's textfile
+                              collector
+
+The GUI's Tools > Diagnostics window shows the same values, next to the
+runs that are active right now. Nothing in this module imports the rest
+of Yonky, so the core can import it.
+"""
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from yonky_files import atomic_write
+
+DEFAULT_METRICS_INTERVAL_SECONDS = 15
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+REFRESH_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+               for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+class Metric:
+    """A named metric with optional labels; samples() yields its values"""
+
+    type = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, labels, value) for every sample"""
+        return iter(())
+
+
+class Counter(Metric):
+    """Monotonic total
+
+    Functions added with add_function() contribute to the unlabelled value
+    when it is read, for totals that are still accumulating elsewhere.
+    """
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {} if labelnames else {(): 0}
+        self._functions = []
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def add_function(self, func):
+        self._functions.append(func)
+
+    def value(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            value = self._values.get(key, 0)
+        if not key:
+            value += sum(func() for func in self._functions)
+        return value
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            if not key:
+                value += sum(func() for func in self._functions)
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Gauge(Metric):
+    """Value that goes up and down, or is read from a function"""
+
+    type = "gauge"
+
+    def __init__(self, name, help, function=None):
+        super().__init__(name, help)
+        self._value = 0
+        self._function = function
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, func):
+        self._function = func
+
+    def value(self):
+        return self._function() if self._function is not None else self._value
+
+    def samples(self):
+        yield "", {}, self.value()
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed cumulative buckets"""
+
+    type = "histogram"
+
+    def __init__(self, name, help, buckets):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts = [0] * len(self.buckets)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value):
+        with self._lock:
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """(per-bucket counts, sum, count)"""
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile, None when empty"""
+        counts, _, count = self.snapshot()
+        if not count:
+            return None
+        rank = fraction * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self):
+        counts, total, count = self.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            yield "_bucket", {"le": _format_value(bound if math.isinf(bound) else float(bound))}, cumulative
+        yield "_sum", {}, total
+        yield "_count", {}, count
+
+
+class Registry:
+    """Ordered collection of metrics"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, function=None):
+        return self.register(Gauge(name, help, function))
+
+    def histogram(self, name, help, buckets):
+        return self.register(Histogram(name, help, buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """(metric, value) rows for humans; histograms as count, mean and p95"""
+        rows = []
+        for metric in self.metrics:
+            if isinstance(metric, Histogram):
+                _, total, count = metric.snapshot()
+                if count:
+                    p95 = metric.quantile(0.95)
+                    p95_text = "over the largest bucket" if math.isinf(p95) else f"<= {p95:g}"
+                    rows.append((metric.name, f"{count} observed, mean {total / count:.4g}, p95 {p95_text}"))
+                else:
+                    rows.append((metric.name, "none observed"))
+                continue
+            for _, labels, value in metric.samples():
+                if isinstance(value, float):
+                    value = f"{value:.0f}" if abs(value) >= 1e6 else f"{value:.4g}"
+                else:
+                    value = str(value)
+                rows.append((metric.name + _format_labels(labels), value))
+        return rows
+
+
+METRICS = Registry()
+
+START_TIME = METRICS.gauge("yonky_start_time_seconds", "Unix time the launcher started")
+START_TIME.set(time.time())
+THREADS = METRICS.gauge("yonky_threads", "Threads alive in the launcher process", threading.active_count)
+
+RUNS_SUBMITTED = METRICS.counter("yonky_runs_submitted_total", "Runs queued on an execution engine")
+RUNS_FINISHED = METRICS.counter("yonky_runs_finished_total", "Finished runs by final status", ("status",))
+RUNS_ACTIVE = METRICS.gauge("yonky_runs_active", "Runs executing right now")
+RUNS_QUEUED = METRICS.gauge("yonky_runs_queued", "Runs waiting for a free worker")
+RUN_DURATION = METRICS.histogram("yonky_run_duration_seconds", "Duration of finished runs", DURATION_BUCKETS)
+RUN_QUEUE_WAIT = METRICS.histogram("yonky_run_queue_wait_seconds", "Time runs waited for a worker",
+                                   DURATION_BUCKETS)
+OUTPUT_LINES = METRICS.counter("yonky_output_lines_total", "Output lines streamed by runs")
+OUTPUT_BYTES = METRICS.counter("yonky_output_bytes_total", "Output characters streamed by runs")
+
+UI_PUMP_LAG = METRICS.histogram("yonky_ui_pump_lag_seconds",
+                                "How late the GUI output pump ran after its interval", LAG_BUCKETS)
+UI_PUMP_DURATION = METRICS.histogram("yonky_ui_pump_duration_seconds",
+                                     "Time the GUI output pump held the Tk main loop", LAG_BUCKETS)
+UI_BACKLOG = METRICS.gauge("yonky_ui_output_backlog_lines", "Output lines waiting for the GUI output pump")
+
+CATALOG_REFRESH = METRICS.histogram("yonky_catalog_refresh_seconds", "Duration of script folder rescans",
+                                    REFRESH_BUCKETS)
+CATALOG_SCRIPTS = METRICS.gauge("yonky_catalog_scripts", "Scripts in the catalog")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """Serves the registry at http://127.0.0.1:port/metrics on a daemon thread
+
+    Raises OSError when the port is taken.
+    """
+
+    def __init__(self, port, registry=METRICS, host="127.0.0.1"):
+        handler = type("Handler", (_Handler,), {"registry": registry})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MetricsFileWriter:
+    """Rewrites path with the rendered registry every interval seconds
+
+    The file is replaced atomically so a collector never reads half of it;
+    stop() writes a final snapshot.
+    """
+
+    def __init__(self, path, interval=DEFAULT_METRICS_INTERVAL_SECONDS, registry=METRICS, on_error=None):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.on_error = on_error
+        self._failed = False
+        self._stop = threading.Event()
+        self.write()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def write(self):
+        try:
+            with atomic_write(self.path) as f:
+                f.write(self.registry.render())
+        except OSError as e:
+            # Reported once, not every interval
+            if not self._failed and self.on_error is not None:
+                self.on_error(f"Could not write metrics file {self.path}: {e}")
+            self._failed = True
+            return
+        self._failed = False
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        self._stop.set()
+        self.write()
+
+
+def start_exporters(config_data, on_error):
+    """Start the exporters enabled in config_data; return them for stop()
+
+    on_error(message) is called for exporters that could not start.
+    """
+    exporters = []
+    port = config_data.get("metrics_port")
+    if port:
+        try:
+            exporters.append(MetricsServer(int(port)))
+        except (OSError, ValueError) as e:
+            on_error(f"Could not serve metrics on port {port}: {e}")
+    path = config_data.get("metrics_file")
+    if path:
+        interval = config_data.get("metrics_interval", DEFAULT_METRICS_INTERVAL_SECONDS)
+        exporters.append(MetricsFileWriter(path, interval, on_error=on_error))
+    return exporters
+
+
+def stop_exporters(exporters):
+    for exporter in exporters:
+        exporter.stop()
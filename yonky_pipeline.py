@@ -0,0 +1,285 @@
+"""Script pipelines: named groups of scripts with dependencies between them
+
+Pipelines are defined in config.json:
+
+    "pipelines": {
+        "nightly": {
+            "concurrency": 2,
+            "on_failure": "abort",
+            "env": {"TARGET": "lab"},
+            "steps": {
+                "cpu":     {"script": "check-cpu.ps1", "args": ["-Threshold", "80"]},
+                "cleanup": {"script": "cleanup.ps1", "on_failure": "continue"},
+                "report":  {"script": "report.ps1", "needs": ["cpu", "cleanup"]}
+            }
+        }
+    }
+
+A step starts once every step in its "needs" has finished; independent
+steps run in parallel, at most "concurrency" at a time, through the normal
+ExecutionEngine/run_script path. "args" are passed to the script and "env"
+(pipeline-wide, then per step) is added to its environment, together with
+YONKY_PIPELINE, YONKY_STEP and, for every dependency, YONKY_<STEP>_STATUS,
+YONKY_<STEP>_EXIT_CODE and YONKY_<STEP>_LOG.
+
+When a step fails, "on_failure" (per step, else per pipeline) decides:
+"abort" (the default) starts no further steps and skips the rest, while
+"continue" lets the steps that depend on it run anyway.
+"""
+import os
+import re
+import threading
+import time
+
+from yonky_core import SCRIPTS_DIR, RunState
+
+ABORT = "abort"
+CONTINUE = "continue"
+FAILURE_POLICIES = (ABORT, CONTINUE)
+
+PENDING = "pending"
+SKIPPED = "skipped"
+
+
+class PipelineError(Exception):
+    """A pipeline definition in config.json is invalid"""
+
+
+class PipelineStep:
+    """One script of a pipeline"""
+
+    __slots__ = ("name", "script", "needs", "args", "env", "on_failure")
+
+    def __init__(self, name, script, needs=(), args=(), env=None, on_failure=None):
+        self.name = name
+        self.script = script
+        self.needs = list(needs)
+        self.args = [str(arg) for arg in args]
+        self.env = {str(key): str(value) for key, value in (env or {}).items()}
+        self.on_failure = on_failure
+
+
+class Pipeline:
+    """A validated pipeline definition; steps are in dependency order"""
+
+    def __init__(self, name, steps, concurrency=None, on_failure=ABORT, env=None):
+        self.name = name
+        self.steps = steps
+        self.concurrency = concurrency
+        self.on_failure = on_failure
+        self.env = {str(key): str(value) for key, value in (env or {}).items()}
+
+    def missing_scripts(self):
+        """Scripts referenced by the pipeline that are not in the scripts folder"""
+        return [step.script for step in self.steps
+                if not os.path.isfile(os.path.join(SCRIPTS_DIR, step.script))]
+
+
+def _env_name(step_name):
+    return re.sub(r"\W", "_", step_name).upper()
+
+
+def _sort_steps(pipeline_name, steps):
+    """Order steps so every step comes after its dependencies"""
+    ordered = []
+    state = {}
+
+    def visit(step, path):
+        if state.get(step.name) == "done":
+            return
+        if state.get(step.name) == "visiting":
+            cycle = " -> ".join(path + [step.name])
+            raise PipelineError(f"Pipeline '{pipeline_name}' has a dependency cycle: {cycle}")
+        state[step.name] = "visiting"
+        for need in step.needs:
+            visit(steps[need], path + [step.name])
+        state[step.name] = "done"
+        ordered.append(step)
+
+    for step in steps.values():
+        visit(step, [])
+    return ordered
+
+
+def parse_pipeline(name, definition):
+    """Build a Pipeline from its config.json definition"""
+    if not isinstance(definition, dict) or not isinstance(definition.get("steps"), dict):
+        raise PipelineError(f"Pipeline '{name}' needs a \"steps\" object")
+
+    on_failure = definition.get("on_failure", ABORT)
+    steps = {}
+    for step_name, step in definition["steps"].items():
+        if isinstance(step, str):
+            step = {"script": step}
+        if not isinstance(step, dict) or not step.get("script"):
+            raise PipelineError(f"Step '{step_name}' of pipeline '{name}' needs a \"script\"")
+        steps[step_name] = PipelineStep(
+            step_name,
+            step["script"],
+            needs=step.get("needs", []),
+            args=step.get("args", []),
+            env=step.get("env"),
+            on_failure=step.get("on_failure"),
+        )
+
+    for step in steps.values():
+        for policy in (step.on_failure, on_failure):
+            if policy is not None and policy not in FAILURE_POLICIES:
+                raise PipelineError(f"Unknown on_failure '{policy}' in pipeline '{name}'")
+        for need in step.needs:
+            if need not in steps:
+                raise PipelineError(f"Step '{step.name}' of pipeline '{name}' needs unknown step '{need}'")
+
+    concurrency = definition.get("concurrency")
+    return Pipeline(name, _sort_steps(name, steps), int(concurrency) if concurrency else None,
+                    on_failure, definition.get("env"))
+
+
+def load_pipelines(config_data):
+    """All pipelines defined in config_data, by name"""
+    definitions = config_data.get("pipelines") or {}
+    if not isinstance(definitions, dict):
+        raise PipelineError("\"pipelines\" in config.json must be an object")
+    return {name: parse_pipeline(name, definition) for name, definition in definitions.items()}
+
+
+class PipelineRun:
+    """Schedules the steps of one pipeline on an ExecutionEngine
+
+    start() submits every step whose dependencies are done; each finished
+    run submits the steps it unblocks, so no thread is needed besides the
+    engine's workers. on_change(pipeline_run, step) is called from worker
+    threads whenever a step starts or ends and once more with step None
+    when the whole pipeline is over.
+    """
+
+    def __init__(self, pipeline, engine, config_data, concurrency=None, on_change=None):
+        self.pipeline = pipeline
+        self.engine = engine
+        self.config_data = config_data
+        self.concurrency = max(1, int(concurrency or pipeline.concurrency or len(pipeline.steps)))
+        self.on_change = on_change
+        self.status = RunState.QUEUED
+        self.states = {step.name: PENDING for step in pipeline.steps}
+        self.runs = {}
+        self.start_time = None
+        self.end_time = None
+        self.done = threading.Event()
+        self._aborted = False
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.time()) - self.start_time
+
+    def start(self):
+        self.start_time = time.time()
+        self.status = RunState.RUNNING
+        self._schedule()
+        return self
+
+    def cancel(self):
+        """Start no more steps and cancel the ones already submitted"""
+        with self._lock:
+            self._cancelled = True
+            runs = [run for run in self.runs.values() if not run.finished]
+        for run in runs:
+            self.engine.cancel(run)
+        self._schedule()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _step_env(self, step):
+        env = {**self.pipeline.env, **step.env,
+               "YONKY_PIPELINE": self.pipeline.name, "YONKY_STEP": step.name}
+        for need in step.needs:
+            run = self.runs[need]
+            prefix = f"YONKY_{_env_name(need)}_"
+            env[prefix + "STATUS"] = run.status
+            env[prefix + "EXIT_CODE"] = "" if run.returncode is None else str(run.returncode)
+            env[prefix + "LOG"] = run.log.path if run.log is not None else ""
+        return env
+
+    def _step_finished(self, step, run):
+        with self._lock:
+            self.runs[step.name] = run
+            self.states[step.name] = run.status
+            if run.status != RunState.SUCCEEDED:
+                policy = step.on_failure or self.pipeline.on_failure
+                if policy == ABORT:
+                    self._aborted = True
+        self._changed(step)
+        self._schedule()
+
+    def _schedule(self):
+        """Submit ready steps, skip unreachable ones and detect the end"""
+        to_submit = []
+        with self._lock:
+            if self.done.is_set():
+                return
+            stopping = self._aborted or self._cancelled
+            active = sum(1 for state in self.states.values()
+                         if state in (RunState.QUEUED, RunState.RUNNING))
+            for step in self.pipeline.steps:
+                if self.states[step.name] != PENDING:
+                    continue
+                if stopping or any(self.states[need] == SKIPPED for need in step.needs):
+                    self.states[step.name] = SKIPPED
+                    continue
+                if active >= self.concurrency:
+                    continue
+                if all(self.states[need] not in (PENDING, RunState.QUEUED, RunState.RUNNING)
+                       for need in step.needs):
+                    self.states[step.name] = RunState.QUEUED
+                    active += 1
+                    to_submit.append(step)
+
+            finished = not to_submit and active == 0 and PENDING not in self.states.values()
+            if finished:
+                if self._cancelled:
+                    self.status = RunState.CANCELLED
+                elif all(state == RunState.SUCCEEDED for state in self.states.values()):
+                    self.status = RunState.SUCCEEDED
+                else:
+                    self.status = RunState.FAILED
+                self.end_time = time.time()
+                self.done.set()
+
+        for step in to_submit:
+            run = self.engine.submit(
+                step.script, self.config_data, step.args, self._step_env(step),
+                on_finish=lambda run, step=step: self._step_finished(step, run))
+            with self._lock:
+                self.runs[step.name] = run
+            self._changed(step)
+        if finished:
+            self._changed(None)
+
+    def _changed(self, step):
+        if self.on_change is not None:
+            self.on_change(self, step)
+
+    def step_status(self, name):
+        """pending, skipped or the status of the step's run"""
+        run = self.runs.get(name)
+        return run.status if run is not None else self.states[name]
+
+    def summary(self):
+        """One line per step with its state and duration"""
+        lines = []
+        for step in self.pipeline.steps:
+            run = self.runs.get(step.name)
+            state = self.step_status(step.name)
+            if run is not None and run.finished:
+                lines.append(f"{step.name} ({step.script}): {state} in {run.duration:.2f}s")
+            else:
+                lines.append(f"{step.name} ({step.script}): {state}")
+        return lines
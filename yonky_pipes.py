@@ -0,0 +1,201 @@
+"""One shared I/O loop for the output pipes of every running script
+
+Instead of two reader threads per run, spawn() starts the child on a single
+background asyncio event loop (the proactor loop on Windows) that multiplexes
+the stdout and stderr pipes of all active children. Output arrives in binary
+chunks, is decoded incrementally with the run's encoding and split into
+lines; emit(text, tag) is called on the loop thread in the order the chunks
+arrive, so stdout and stderr stay interleaved the way the child wrote them.
+
+Text that never gets a newline (prompts, progress bars, huge single-line
+dumps) is emitted anyway once it is PARTIAL_LINE_CHARS long or its pipe has
+been quiet for PARTIAL_LINE_SECONDS, so it cannot hold back the output.
+"""
+import asyncio
+import codecs
+import locale
+import subprocess
+import threading
+
+PARTIAL_LINE_CHARS = 4096
+PARTIAL_LINE_SECONDS = 0.5
+
+
+def resolve_encoding(name):
+    """Codec for decoding script output; empty means the system default
+
+    Any Python codec name works, e.g. "utf-8", "utf-16" (BOM-aware), "cp850",
+    or "oem" on Windows. Raises LookupError for unknown names.
+    """
+    if not name:
+        return locale.getpreferredencoding(False)
+    return codecs.lookup(name).name
+
+
+class LineDecoder:
+    """Incremental bytes-to-lines decoder for one pipe"""
+
+    def __init__(self, encoding):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.pending = ""
+
+    def feed(self, data, final=False):
+        """Decode data and return the complete lines it finishes"""
+        text = self.pending + self._decoder.decode(data, final)
+        lines = text.splitlines(True)
+        self.pending = ""
+        # Keep an unterminated last line, and a trailing "\r" that may be
+        # the first half of a "\r\n" split across chunks
+        if lines and not final and (lines[-1].splitlines() == [lines[-1]] or lines[-1].endswith("\r")):
+            self.pending = lines.pop()
+        return [line.rstrip() for line in lines]
+
+    def take_partial(self):
+        """Return and forget the unterminated text decoded so far"""
+        partial, self.pending = self.pending, ""
+        return partial.rstrip()
+
+
+class ChildProcess:
+    """A child started by spawn()
+
+    Offers the part of the Popen interface (pid, returncode, poll, wait,
+    send_signal, kill) that yonky_process.terminate_tree() relies on.
+    """
+
+    def __init__(self, loop, args):
+        self.args = args
+        self.pid = None
+        self.returncode = None
+        self._loop = loop
+        self._transport = None
+        self._exited = threading.Event()
+        self._output_closed = threading.Event()
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        if not self._exited.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+
+    def wait_for_output(self, timeout=None):
+        """Wait until both pipes are closed; return False on timeout"""
+        return self._output_closed.wait(timeout)
+
+    def _call(self, method, *args):
+        def call():
+            try:
+                getattr(self._transport, method)(*args)
+            except (ProcessLookupError, OSError):
+                pass
+        self._loop.call_soon_threadsafe(call)
+
+    def send_signal(self, sig):
+        self._call("send_signal", sig)
+
+    def kill(self):
+        self._call("kill")
+
+    def close(self):
+        """Stop reading: close the pipes even if a descendant still holds them"""
+        self._call("close")
+
+    def _attach(self, transport):
+        self._transport = transport
+        self.pid = transport.get_pid()
+
+    def _process_exited(self):
+        self.returncode = self._transport.get_returncode()
+        self._exited.set()
+
+    def _connection_lost(self):
+        self._transport.close()
+        self._output_closed.set()
+
+
+class _OutputProtocol(asyncio.SubprocessProtocol):
+    """Feeds a child's pipes through LineDecoders into emit"""
+
+    TAGS = {1: "", 2: "error"}
+
+    def __init__(self, child, emit, encoding):
+        self.child = child
+        self.emit = emit
+        self.decoders = {fd: LineDecoder(encoding) for fd in self.TAGS}
+        self.flush_handles = {}
+
+    def connection_made(self, transport):
+        self.child._attach(transport)
+
+    def pipe_data_received(self, fd, data):
+        decoder = self.decoders[fd]
+        for line in decoder.feed(data):
+            self.emit(line, self.TAGS[fd])
+        if len(decoder.pending) >= PARTIAL_LINE_CHARS:
+            self._flush_partial(fd)
+        elif decoder.pending:
+            # Only a pipe that stays quiet gets its partial line flushed
+            handle = self.flush_handles.pop(fd, None)
+            if handle is not None:
+                handle.cancel()
+            loop = asyncio.get_running_loop()
+            self.flush_handles[fd] = loop.call_later(PARTIAL_LINE_SECONDS, self._flush_partial, fd)
+
+    def _flush_partial(self, fd):
+        handle = self.flush_handles.pop(fd, None)
+        if handle is not None:
+            handle.cancel()
+        partial = self.decoders[fd].take_partial()
+        if partial:
+            self.emit(partial, self.TAGS[fd])
+
+    def pipe_connection_lost(self, fd, exc):
+        if fd not in self.decoders:
+            return
+        handle = self.flush_handles.pop(fd, None)
+        if handle is not None:
+            handle.cancel()
+        for line in self.decoders[fd].feed(b"", final=True):
+            self.emit(line, self.TAGS[fd])
+
+    def process_exited(self):
+        self.child._process_exited()
+
+    def connection_lost(self, exc):
+        self.child._connection_lost()
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop():
+    """The shared event loop, started on a daemon thread on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="yonky-pipes", daemon=True).start()
+        return _loop
+
+
+def spawn(cmd, emit, encoding=None, **popen_kwargs):
+    """Start cmd with its output read by the shared loop; return a ChildProcess
+
+    emit(text, tag) gets each output line with tag "" for stdout and "error"
+    for stderr. popen_kwargs are passed on to Popen (e.g. process group
+    flags). Raises what Popen raises if cmd cannot be started.
+    """
+    loop = _get_loop()
+    encoding = resolve_encoding(encoding)
+    child = ChildProcess(loop, cmd)
+
+    async def start():
+        await loop.subprocess_exec(
+            lambda: _OutputProtocol(child, emit, encoding), *cmd,
+            stdin=None, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **popen_kwargs)
+
+    asyncio.run_coroutine_threadsafe(start(), loop).result()
+    return child
@@ -0,0 +1,64 @@
+"""Process-tree helpers shared by script runs and warm hosts
+
+Every child is started in its own process group (a new session on POSIX,
+CREATE_NEW_PROCESS_GROUP on Windows) so that terminate_tree() can stop the
+script together with anything it launched, not just the direct child.
+"""
+import os
+import signal
+import subprocess
+
+DEFAULT_KILL_GRACE_SECONDS = 5
+
+
+def process_group_kwargs():
+    """Popen keyword arguments that put the child in a new process group"""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_tree(process, grace=DEFAULT_KILL_GRACE_SECONDS):
+    """Stop process and its descendants: gracefully first, then by force
+
+    The group is asked to stop (SIGTERM, or CTRL_BREAK on Windows) and given
+    grace seconds; whatever is left of it is then killed (SIGKILL, or
+    'taskkill /T /F').
+    """
+    if os.name == "nt":
+        try:
+            process.send_signal(signal.CTRL_BREAK_EVENT)
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            process.kill()
+        return
+
+    _signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    # Also reaps descendants that outlived or ignored the polite request
+    _signal_group(process, signal.SIGKILL)
+    process.wait()
+
+
+def kill_leftovers(process):
+    """Kill descendants still running after the direct child has exited"""
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        _signal_group(process, signal.SIGKILL)
@@ -0,0 +1,237 @@
+"""Structured records in script output, and their export to JSON or CSV
+
+A script emits a record by writing one JSON object on a stdout line behind
+the record marker:
+
+    Write-Output ("##yonky-record " + ($row | ConvertTo-Json -Compress))
+
+Scripts whose config.json entry has "records": "json" may also write plain
+JSON instead: every stdout line holding a JSON object (or an array of
+objects) is a record, and so is a multi-line ConvertTo-Json block that
+starts with a "[" or "{" line and ends with the matching "]" or "}" line.
+
+Record lines are taken out of the text output. Each run's records are
+appended to a .records.jsonl file next to its run log as they arrive; only
+the newest view_limit of them are kept in memory for the table view, and
+export streams from the file, so a run can produce any number of records.
+"""
+import csv
+import json
+import os
+import threading
+from collections import deque
+
+from yonky_files import atomic_write
+
+RECORD_MARKER = "##yonky-record "
+RECORDS_SUFFIX = ".records.jsonl"
+JSON_RECORDS = "json"
+DEFAULT_RECORDS_VIEW_LIMIT = 5000
+# A JSON block longer than this is shown as text instead of being parsed
+RECORD_BLOCK_MAX_LINES = 10000
+
+EXPORT_FORMATS = ("json", "csv")
+# Column naming the run of each record when several runs are exported together
+RUN_COLUMN = "_run"
+
+
+def records_path(log_path):
+    """Records file that belongs to the run log at log_path"""
+    return os.path.splitext(log_path)[0] + RECORDS_SUFFIX
+
+
+def _as_records(value):
+    """The records in a parsed JSON value, or None if it holds none"""
+    if isinstance(value, dict):
+        return [value]
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return value
+    return None
+
+
+class RunRecords:
+    """The structured records of one run
+
+    add() may be called from any thread. Records are spilled to path (once
+    set) and queued for the GUI, which takes them with drain(); the queue
+    and the view keep at most view_limit records.
+    """
+
+    def __init__(self, view_limit=DEFAULT_RECORDS_VIEW_LIMIT):
+        self.view_limit = view_limit
+        self.path = None
+        self.count = 0
+        self.columns = []
+        self._column_set = set()
+        self._view = deque(maxlen=view_limit)
+        self._new = deque(maxlen=view_limit)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def add(self, records):
+        with self._lock:
+            for record in records:
+                for key in record:
+                    if key not in self._column_set:
+                        self._column_set.add(key)
+                        self.columns.append(key)
+            self.count += len(records)
+            self._view.extend(records)
+            self._new.extend(records)
+            if self.path is not None:
+                try:
+                    if self._file is None:
+                        self._file = open(self.path, "w", encoding="utf-8")
+                    for record in records:
+                        self._file.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+                except OSError:
+                    self.path = None
+
+    def drain(self, max_records=None):
+        """Return and forget records added since the last drain"""
+        with self._lock:
+            count = len(self._new) if max_records is None else min(max_records, len(self._new))
+            return [self._new.popleft() for _ in range(count)]
+
+    @property
+    def complete(self):
+        """True when every record can be read back, not just the view"""
+        return self.path is not None or self.count <= self.view_limit
+
+    def __iter__(self):
+        """Every record, read back from the records file when there is one"""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._file.flush()
+            path = self.path if self._file is not None else None
+            if path is None:
+                records = list(self._view)
+        if path is None:
+            yield from records
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line still being written by the run
+                    continue
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+
+
+class RecordParser:
+    """emit wrapper that diverts record lines from stdout into RunRecords
+
+    Lines with other tags (stderr, headers) pass through untouched. Call
+    close() when the output has ended, so an unfinished JSON block is
+    shown as text.
+    """
+
+    def __init__(self, emit, records, json_lines=False):
+        self.emit = emit
+        self.records = records
+        self.json_lines = json_lines
+        self.block = None
+
+    def __call__(self, text, tag=""):
+        if tag != "":
+            self.emit(text, tag)
+            return
+        if self.block is not None:
+            self._feed_block(text)
+            return
+        if text.startswith(RECORD_MARKER):
+            if not self._add_json(text[len(RECORD_MARKER):]):
+                self.emit(text, tag)
+            return
+        if self.json_lines:
+            if text in ("[", "{"):
+                self.block = [text]
+                return
+            if text[:1] in ("[", "{") and self._add_json(text):
+                return
+        self.emit(text, tag)
+
+    def _add_json(self, text):
+        try:
+            records = _as_records(json.loads(text))
+        except ValueError:
+            return False
+        if records is None:
+            return False
+        self.records.add(records)
+        return True
+
+    def _feed_block(self, text):
+        self.block.append(text)
+        closing = "]" if self.block[0] == "[" else "}"
+        if text == closing:
+            block, self.block = self.block, None
+            if not self._add_json("\n".join(block)):
+                self._emit_lines(block)
+        elif len(self.block) >= RECORD_BLOCK_MAX_LINES:
+            block, self.block = self.block, None
+            self._emit_lines(block)
+
+    def _emit_lines(self, lines):
+        for line in lines:
+            self.emit(line, "")
+
+    def close(self):
+        if self.block is not None:
+            block, self.block = self.block, None
+            self._emit_lines(block)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+def export_records(sources, path, fmt=None):
+    """Write the records of sources, a list of (run title, RunRecords), to path
+
+    fmt is "json" or "csv", by default taken from the file extension. With
+    more than one source every record gets a RUN_COLUMN naming its run.
+    Records are streamed, never all held in memory. Returns the number of
+    records written.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "json")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    labelled = len(sources) > 1
+
+    def rows():
+        for title, records in sources:
+            for record in records:
+                yield {RUN_COLUMN: title, **record} if labelled else record
+
+    written = 0
+    with atomic_write(path, newline="") as f:
+        if fmt == "csv":
+            columns = [RUN_COLUMN] if labelled else []
+            for _, records in sources:
+                columns.extend(column for column in records.columns if column not in columns)
+            writer = csv.DictWriter(f, columns, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows():
+                writer.writerow({key: _csv_value(value) for key, value in row.items()})
+                written += 1
+        else:
+            f.write("[")
+            for row in rows():
+                f.write(",\n" if written else "\n")
+                f.write(json.dumps(row, default=str))
+                written += 1
+            f.write("\n]\n")
+    return written
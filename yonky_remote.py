@@ -0,0 +1,240 @@
+"""Fan-out: run one script against many target hosts
+
+Targets are read from an inventory file, targets.txt next to config.json
+(or "targets_file" in config.json):
+
+    # one host per line; a [name] line starts a group
+    fileserver01
+    [lab]
+    lab-pc1
+    lab-pc2
+
+Every host also belongs to the group "all". Each host gets its own run on a
+dedicated ExecutionEngine, so at most "fanout_parallel" hosts are busy at
+once and every run goes through the normal run_script path (timeouts,
+cancelling, logs, history). The command line comes from the transport,
+"transport" in config.json:
+
+    "winrm"  Invoke-Command -ComputerName <host>, passing the script's
+             exit code back
+    "ssh"    ssh -- <host> powershell -EncodedCommand <script contents>
+    "local"  runs the script on this machine (a stub for testing)
+
+or a custom command template list, e.g. ["pwsh", "-Command",
+"Invoke-Command -HostName {host} -FilePath '{script}'"]. Templates may use
+{host}, {script}, {script_name}, {encoded_script} and {execution_policy};
+a placeholder written inside single quotes, as in '{script}', is escaped
+for a PowerShell string.
+Every run also gets YONKY_TARGET=<host> in its environment.
+"""
+import base64
+import os
+import threading
+
+from yonky_core import (
+    BASE_DIR,
+    SCRIPTS_DIR,
+    DEFAULT_FANOUT_PARALLEL,
+    DEFAULT_RUN_LOG_RETENTION,
+    ExecutionEngine,
+    RunLog,
+    RunState,
+    build_command,
+)
+
+TARGETS_FILE = os.path.join(BASE_DIR, "targets.txt")
+ALL_TARGETS = "all"
+
+LOCAL = "local"
+# The script runs as a .ps1 file on the host so that its "exit N" sets
+# $LASTEXITCODE there; the code comes back as a marker object after the
+# output and becomes the exit code of the local PowerShell
+WINRM_COMMAND = """$code = 0
+Invoke-Command -ComputerName '{host}' -ErrorAction Stop -ArgumentList (Get-Content -Raw -LiteralPath '{script}') -ScriptBlock {
+    param($body)
+    $path = Join-Path ([IO.Path]::GetTempPath()) ([IO.Path]::GetRandomFileName() + '.ps1')
+    Set-Content -LiteralPath $path -Value $body -Encoding UTF8
+    try {
+        $global:LASTEXITCODE = 0
+        & $path
+        $exitCode = if ($LASTEXITCODE) { $LASTEXITCODE } else { 0 }
+    } finally {
+        Remove-Item -LiteralPath $path -ErrorAction SilentlyContinue
+    }
+    [pscustomobject]@{ YonkyExitCode = $exitCode }
+} | ForEach-Object { if ($null -ne $_.YonkyExitCode) { $code = $_.YonkyExitCode } else { $_ } }
+exit $code"""
+TRANSPORTS = {
+    "winrm": ["powershell", "-NoProfile", "-NonInteractive", "-ExecutionPolicy", "{execution_policy}",
+              "-Command", WINRM_COMMAND],
+    "ssh": ["ssh", "-o", "BatchMode=yes", "--", "{host}",
+            "powershell -NoProfile -NonInteractive -EncodedCommand {encoded_script}"],
+    LOCAL: None,
+}
+# Characters PowerShell takes as a single quote; doubled inside '...'
+POWERSHELL_QUOTES = "'\u2018\u2019\u201a\u201b"
+
+
+class TransportError(Exception):
+    """The configured transport is unknown or malformed"""
+
+
+def load_inventory(path=None):
+    """Read the inventory file; return {group: [hosts]} including "all"
+
+    A missing file is an empty inventory.
+    """
+    groups = {ALL_TARGETS: []}
+    group = None
+    try:
+        f = open(path or TARGETS_FILE, "r", encoding="utf-8-sig")
+    except OSError:
+        return groups
+    with f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                group = line[1:-1].strip()
+                groups.setdefault(group, [])
+                continue
+            if group is not None and line not in groups[group]:
+                groups[group].append(line)
+            if line not in groups[ALL_TARGETS]:
+                groups[ALL_TARGETS].append(line)
+    return groups
+
+
+def resolve_targets(inventory, names):
+    """Expand group and host names into a list of hosts, keeping order
+
+    No names means every host in the inventory. Names that are not groups
+    are taken as host names, so hosts can be given without an inventory.
+    """
+    hosts = []
+    for name in names or [ALL_TARGETS]:
+        for host in inventory.get(name, [name]):
+            if host not in hosts:
+                hosts.append(host)
+    return hosts
+
+
+def transport_command(config_data, script_path, host, transport=None):
+    """Command line that runs script_path on host through the transport"""
+    transport = transport or config_data.get("transport", "winrm")
+    template = TRANSPORTS.get(transport, transport) if isinstance(transport, str) else transport
+    if template is None:
+        return build_command(script_path, config_data)
+    if not isinstance(template, list) or not template:
+        raise TransportError(f"Unknown transport: {transport}")
+
+    values = {
+        "{host}": host,
+        "{script}": script_path,
+        "{script_name}": os.path.basename(script_path),
+        "{execution_policy}": config_data.get("execution_policy", "Bypass"),
+    }
+    if any("{encoded_script}" in str(arg) for arg in template):
+        with open(script_path, "r", encoding="utf-8-sig") as f:
+            values["{encoded_script}"] = base64.b64encode(f.read().encode("utf-16-le")).decode("ascii")
+
+    command = []
+    for arg in template:
+        arg = str(arg)
+        # Plain replacement, so braces of PowerShell script blocks survive;
+        # a value in a single-quoted string has its quotes escaped
+        for placeholder, value in values.items():
+            arg = arg.replace(f"'{placeholder}'", quote_powershell(value)).replace(placeholder, value)
+        command.append(arg)
+    return command
+
+
+def quote_powershell(value):
+    """value as a single-quoted PowerShell string literal"""
+    for quote in POWERSHELL_QUOTES:
+        value = value.replace(quote, quote * 2)
+    return f"'{value}'"
+
+
+class FanOut:
+    """One script run on many hosts with bounded parallelism
+
+    start() queues a run per host on a dedicated ExecutionEngine with
+    parallel workers. on_change(run) is called from worker threads as runs
+    change state; done is set once every host has finished.
+    """
+
+    def __init__(self, script_name, hosts, config_data, runner, parallel=None, transport=None,
+                 on_change=None, history=None):
+        self.script_name = script_name
+        self.hosts = list(hosts)
+        self.config_data = config_data
+        self.transport = transport
+        self.parallel = parallel or config_data.get("fanout_parallel", DEFAULT_FANOUT_PARALLEL)
+        self.engine = ExecutionEngine(runner, self.parallel, on_change=on_change, history=history)
+        self.runs = {}
+        self.done = threading.Event()
+        self._remaining = len(self.hosts)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Queue every host; raises TransportError before anything starts"""
+        script_path = os.path.join(SCRIPTS_DIR, self.script_name)
+        commands = {host: transport_command(self.config_data, script_path, host, self.transport)
+                    for host in self.hosts}
+        if not self.hosts:
+            self.done.set()
+        for host in self.hosts:
+            self.runs[host] = self.engine.submit(
+                self.script_name, self.config_data, env={"YONKY_TARGET": host},
+                on_finish=self._run_finished, command=commands[host], target=host)
+        return self
+
+    def _run_finished(self, run):
+        with self._lock:
+            self._remaining -= 1
+            finished = self._remaining == 0
+        if finished:
+            # Runs on targets leave pruning to here; every host's log is kept
+            retention = self.config_data.get("run_log_retention", DEFAULT_RUN_LOG_RETENTION)
+            RunLog.prune(max(retention, len(self.hosts) + 1))
+            self.done.set()
+            self.engine.shutdown()
+
+    def cancel(self):
+        self.engine.cancel_all()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    @property
+    def finished(self):
+        return self.done.is_set()
+
+    def counts(self):
+        """Number of hosts per run status"""
+        counts = {}
+        for run in self.runs.values():
+            counts[run.status] = counts.get(run.status, 0) + 1
+        return counts
+
+    def summary_text(self):
+        """e.g. "12 succeeded, 1 failed, 3 running" """
+        order = [RunState.SUCCEEDED, RunState.FAILED, RunState.TIMED_OUT, RunState.ERROR,
+                 RunState.CANCELLED, RunState.RUNNING, RunState.QUEUED]
+        counts = self.counts()
+        return ", ".join(f"{counts[status]} {status}" for status in order if counts.get(status))
+
+    def results(self):
+        """Per-host result, in inventory order"""
+        return [{
+            "host": host,
+            "status": run.status,
+            "exit_code": run.returncode,
+            "duration": round(run.duration, 3),
+            "output_lines": run.output_lines,
+            "last_output": run.last_output,
+            "records": run.records.count,
+            "log": run.log.path if run.log is not None else None,
+        } for host, run in self.runs.items()]